@@ -0,0 +1,81 @@
+"""``python -m analysis``: one entry point for every analysis script.
+
+    python -m analysis [--data-dir DIR] [--output-dir DIR] <command> [args...]
+
+Each command runs the ``main(argv)`` of one module with the remaining
+arguments. The module is imported only once its command has been chosen, so
+``--help`` and ``paths`` import nothing beyond argparse, and matplotlib and
+the dataset readers are loaded only by the commands that use them.
+
+``--data-dir`` and ``--output-dir`` are exported as ``ANLP_DATA_DIR`` and
+``ANLP_OUTPUT_DIR`` before the import (see ``analysis/paths.py``), so they
+also reach the stages ``run`` starts. ``bench-startup`` checks the start-up
+time of the cheap commands against their budget.
+"""
+
+import argparse
+import importlib
+import os
+import sys
+from typing import List, Optional
+
+
+# command -> (module whose main(argv) it runs, help)
+COMMANDS = {
+    "run": ("analysis.run_all", "run the pipeline in dependency order, skipping fresh stages"),
+    "aaec-metrics": ("analysis.aaec.aaec_analyze", "structural metrics for every AAEC essay"),
+    "aaec-label-stance": ("analysis.aaec.auto_label_stance", "fill in unlabeled stances in stance_labels.csv"),
+    "aaec-compare": ("analysis.aaec.aaec_compare_stance", "pro/con comparison of the AAEC metrics"),
+    "argkp-summary": ("analysis.argkp.argkp_analyze", "summary statistics of ArgKP-2021"),
+    "argkp-baseline": ("analysis.argkp.argkp_baseline", "token-overlap matching baseline for ArgKP"),
+    "argkp-index": ("analysis.argkp.kp_index", "build or query the ArgKP key-point index"),
+    "tokens": ("analysis.tokens", "precompute token IDs for the IBM dataset texts"),
+    "plots": ("analysis.plots.generate_plots", "figures for the stance comparison"),
+    "cmv-pairs": ("analysis.cmv.corpus", "conversation and pair counts of the CMV awry corpus"),
+    "cmv-trees": ("analysis.cmv.reply_trees", "reply-tree metrics for the CMV conversations"),
+    "results": ("analysis.results", "print a results column file as JSON Lines"),
+    "synth": ("analysis.bench.synth", "write a synthetic BRAT corpus"),
+    "bench": ("analysis.bench.run_bench", "scaling benchmarks over synthetic corpora"),
+    "bench-startup": ("analysis.bench.startup", "check start-up time against its budget"),
+    "paths": (None, "print the data and output locations in effect"),
+}
+
+
+def print_paths() -> None:
+    from analysis import paths
+
+    for name in ("REPO_ROOT", "DATA_DIR", "OUTPUT_DIR", "CACHE_DIR", "FIGURES_DIR"):
+        print(f"{name}: {getattr(paths, name)}")
+
+
+def main(argv: Optional[List[str]] = None):
+    width = max(map(len, COMMANDS))
+    parser = argparse.ArgumentParser(
+        prog="python -m analysis",
+        description="Run one of the analysis scripts",
+        epilog="commands:\n" + "\n".join(f"  {c:<{width}}  {h}" for c, (_, h) in COMMANDS.items()),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--data-dir", help="dataset directory (default: dataset/, or $ANLP_DATA_DIR)")
+    parser.add_argument("--output-dir", help="output directory (default: analysis_outputs/, or $ANLP_OUTPUT_DIR)")
+    parser.add_argument("command", choices=COMMANDS, metavar="command")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="arguments for the command (see <command> --help)")
+    args = parser.parse_args(argv)
+
+    # Before any analysis module is imported: their path constants read these
+    if args.data_dir:
+        os.environ["ANLP_DATA_DIR"] = os.path.abspath(args.data_dir)
+    if args.output_dir:
+        os.environ["ANLP_OUTPUT_DIR"] = os.path.abspath(args.output_dir)
+
+    module_name = COMMANDS[args.command][0]
+    if module_name is None:
+        print_paths()
+        return
+    # The command's own argparse usage then reads "python -m analysis <command>"
+    sys.argv[0] = f"python -m analysis {args.command}"
+    importlib.import_module(module_name).main(args.args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,22 @@
+import argparse
 import csv
 import json
 import os
-import statistics
-from typing import Dict, List
+import sys
+from typing import Dict, List, Optional, Sequence
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
-METRICS_PATH = os.path.abspath(
-    os.path.join(
-        os.path.dirname(__file__),
-        "../../analysis_outputs/aaec_structural_metrics.json",
-    )
-)
+from analysis import perf  # noqa: E402
+from analysis.paths import OUTPUT_DIR, output_path  # noqa: E402
+from analysis.resample import bootstrap_ci, permutation_test  # noqa: E402
+from analysis.results import ResultsFile  # noqa: E402
+from analysis.stats import FeatureMatrix, GroupIndex, cohen_d_all  # noqa: E402
+
+
+# aaec_analyze writes both; the JSON is read only when the column file is missing
+METRICS_PATH = output_path("aaec_structural_metrics.col")
+METRICS_JSON_PATH = output_path("aaec_structural_metrics.json")
 STANCE_PATH = os.path.abspath(
     os.path.join(
         os.path.dirname(__file__),
@@ -19,10 +25,21 @@ STANCE_PATH = os.path.abspath(
 )
 
 
-def load_metrics(path: str) -> Dict[str, Dict]:
-    with open(path, encoding="utf-8") as f:
-        items = json.load(f)
-    return {it["essay_id"]: it for it in items}
+def load_metrics(path: Optional[str] = None, features: Optional[Sequence[str]] = None) -> FeatureMatrix:
+    """Essays x ``features`` (default ``METRIC_KEYS``), reading only those columns.
+
+    ``path`` defaults to the column file, or to the JSON if that is missing;
+    a ``.json`` path is loaded record by record.
+    """
+    features = list(features or METRIC_KEYS)
+    if path is None:
+        path = METRICS_PATH if os.path.exists(METRICS_PATH) else METRICS_JSON_PATH
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            items = json.load(f)
+        return FeatureMatrix.from_records({it["essay_id"]: it for it in items}.values(), features)
+    with ResultsFile(path) as results:
+        return results.matrix(features)
 
 
 def load_stances(path: str) -> List[Dict]:
@@ -34,88 +51,104 @@ def load_stances(path: str) -> List[Dict]:
     return rows
 
 
-def cohen_d(x: List[float], y: List[float]) -> float:
-    if not x or not y:
-        return 0.0
-    mean_x = statistics.mean(x)
-    mean_y = statistics.mean(y)
-    var_x = statistics.pvariance(x) if len(x) > 1 else 0.0
-    var_y = statistics.pvariance(y) if len(y) > 1 else 0.0
-    # pooled std
-    n_x, n_y = max(1, len(x)), max(1, len(y))
-    pooled = ((n_x - 1) * var_x + (n_y - 1) * var_y) / max(1, (n_x + n_y - 2))
-    sd = pooled ** 0.5
-    if sd == 0:
-        return 0.0
-    return (mean_x - mean_y) / sd
-
-
-def main():
-    metrics = load_metrics(METRICS_PATH)
-    stances = load_stances(STANCE_PATH)
-
-    # Group by topic -> {pro: [essay_ids], con: [essay_ids]}
-    topic_to_ids: Dict[str, Dict[str, List[str]]] = {}
+METRIC_KEYS = [
+    "attack_ratio",
+    "evidence_density",
+    "avg_breadth",
+    "max_depth",
+]
+
+
+def stance_index(metrics: FeatureMatrix, stances: List[Dict]) -> GroupIndex:
+    """Metric rows grouped by ``(topic, "pro"|"con")``; essays without metrics are left out."""
+    pairs = []
     for r in stances:
         eid = r.get("essay_id", "").strip()
         topic = r.get("topic", "").strip()
         stance = ((r.get("stance") or "").strip().lower())
         if not eid or not topic or stance not in {"pro", "con"}:
+            perf.count("stance_rows_unlabeled")
             continue
-        if topic not in topic_to_ids:
-            topic_to_ids[topic] = {"pro": [], "con": []}
-        topic_to_ids[topic][stance].append(eid)
-
-    # Compute per-topic differences (pro - con) for metrics
-    metric_keys = [
-        "attack_ratio",
-        "evidence_density",
-        "avg_breadth",
-        "max_depth",
-    ]
-    per_topic_diffs: Dict[str, Dict[str, float]] = {}
-    pro_values: Dict[str, List[float]] = {k: [] for k in metric_keys}
-    con_values: Dict[str, List[float]] = {k: [] for k in metric_keys}
+        rows = metrics.rows_of([eid])
+        if rows:
+            pairs.append(((topic, stance), rows[0]))
+    return GroupIndex.build(pairs)
+
+
+def compare_stances(
+    metrics: FeatureMatrix,
+    stances: List[Dict],
+    n_resamples: int = 0,
+    seed: Optional[int] = 0,
+    workers: int = 1,
+) -> Dict:
+    """Per-topic pro - con differences and overall effect sizes for every metric.
+
+    With ``n_resamples`` > 0 each metric also gets a paired sign-flip
+    permutation p-value and a 95% bootstrap interval for the mean per-topic
+    difference, reproducible for a given ``seed`` (``None`` = unseeded).
+    """
+    index = stance_index(metrics, stances)
+    # Only topics with essays on both sides; each side is the mean of its essays
+    topics = list(dict.fromkeys(t for t, _ in index.keys if (t, "pro") in index and (t, "con") in index))
+    pro = metrics.group_means(index.subset((t, "pro") for t in topics))
+    con = metrics.group_means(index.subset((t, "con") for t in topics))
 
-    for topic, groups in topic_to_ids.items():
-        pros = groups.get("pro", [])
-        cons = groups.get("con", [])
-        if not pros or not cons:
-            continue
-        # Aggregate by mean across multiple essays per stance if present
-        def agg(vals: List[str], key: str) -> float:
-            xs = [metrics[e][key] for e in vals if e in metrics]
-            return statistics.mean(xs) if xs else 0.0
-
-        diffs = {}
-        for k in metric_keys:
-            p = agg(pros, k)
-            c = agg(cons, k)
-            diffs[k] = p - c
-            pro_values[k].append(p)
-            con_values[k].append(c)
-        per_topic_diffs[topic] = diffs
+    per_topic_diffs: Dict[str, Dict[str, float]] = {}
+    k = len(metrics.features)
+    for i, topic in enumerate(topics):
+        p, c = pro.data[i * k : (i + 1) * k], con.data[i * k : (i + 1) * k]
+        per_topic_diffs[topic] = {f: p[j] - c[j] for j, f in enumerate(metrics.features)}
 
     # Overall stats
     summary = {"per_topic_diffs": per_topic_diffs, "overall": {}}
-    for k in metric_keys:
-        xs = pro_values[k]
-        ys = con_values[k]
-        mean_x = statistics.mean(xs) if xs else 0.0
-        mean_y = statistics.mean(ys) if ys else 0.0
-        d = cohen_d(xs, ys)
-        summary["overall"][k] = {
-            "pro_mean": mean_x,
-            "con_mean": mean_y,
-            "difference": mean_x - mean_y,
-            "cohen_d": d,
-            "n_topics": min(len(xs), len(ys)),
+    pro_means, con_means, d = pro.means(), con.means(), cohen_d_all(pro, con)
+    for j, f in enumerate(metrics.features):
+        summary["overall"][f] = {
+            "pro_mean": pro_means[j],
+            "con_mean": con_means[j],
+            "difference": pro_means[j] - con_means[j],
+            "cohen_d": d[f],
+            "n_topics": len(topics),
         }
-
-    out_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../analysis_outputs"))
-    os.makedirs(out_dir, exist_ok=True)
-    out_path = os.path.join(out_dir, "aaec_stance_comparison.json")
-    with open(out_path, "w", encoding="utf-8") as f:
+        if n_resamples > 0:
+            diffs = [per_topic_diffs[t][f] for t in topics]
+            test = permutation_test(diffs, n_resamples, seed, workers)
+            ci = bootstrap_ci(diffs, n_resamples, seed=seed, workers=workers)
+            summary["overall"][f].update({
+                "permutation_p": test["p_value"],
+                "permutation_exact": test["exact"],
+                "ci_low": ci["ci_low"],
+                "ci_high": ci["ci_high"],
+            })
+    if n_resamples > 0:
+        summary["resampling"] = {"n_resamples": n_resamples, "seed": seed, "confidence": 0.95}
+    return summary
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Compare AAEC structural metrics between pro and con essays")
+    parser.add_argument("--resamples", type=int, default=10000, help="permutations / bootstrap resamples (0 = skip)")
+    parser.add_argument("--seed", type=int, default=0, help="resampling seed, for reproducible output")
+    parser.add_argument("--unseeded", action="store_true", help="draw fresh randomness instead of --seed")
+    parser.add_argument("--workers", type=int, default=1, help="processes for resampling (0 = one per CPU)")
+    args = parser.parse_args(argv)
+
+    with perf.stage("load"):
+        metrics = load_metrics()
+        stances = load_stances(STANCE_PATH)
+    with perf.stage("aggregate"):
+        summary = compare_stances(
+            metrics,
+            stances,
+            n_resamples=args.resamples,
+            seed=None if args.unseeded else args.seed,
+            workers=args.workers,
+        )
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    out_path = output_path("aaec_stance_comparison.json")
+    with perf.stage("write"), open(out_path, "w", encoding="utf-8") as f:
         json.dump(summary, f, indent=2)
     print(f"Wrote stance comparison to {out_path}")
 
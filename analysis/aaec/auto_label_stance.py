@@ -1,16 +1,17 @@
+import argparse
 import csv
+import functools
 import os
 import re
-import zipfile
-from typing import Dict, List, Tuple
+import sys
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from analysis import perf  # noqa: E402
+from analysis.aaec.corpus import AAEC_ZIP_PATH, load_corpus  # noqa: E402
 
 
-AAEC_ZIP_PATH = os.path.abspath(
-    os.path.join(
-        os.path.dirname(__file__),
-        "../../dataset/ArgumentAnnotatedEssays-2.0/brat-project-final.zip",
-    )
-)
 STANCE_CSV = os.path.abspath(os.path.join(os.path.dirname(__file__), "stance_labels.csv"))
 
 
@@ -25,124 +26,176 @@ BAD_IDEA_PAT = re.compile(r"\bbad\s+idea\b", re.I)
 ALLOW_PAT = re.compile(r"\b(allow|allowed|legalize|legalised|legalized)\b", re.I)
 BAN_PAT = re.compile(r"\b(ban|banned|illegal|prohibit|forbid|forbidden)\b", re.I)
 
+# Prompt cues select which families of essay cues are consulted
+TREND_PROMPT_PAT = re.compile(r"positive\s+trend|good\s+thing", re.I)
+IDEA_PROMPT_PAT = re.compile(r"good\s+idea|bad\s+idea", re.I)
+IDEA_QUESTION_PAT = re.compile(r"Do you think.*good idea", re.I)
+ALLOW_BAN_PROMPT_PAT = re.compile(r"(allow|ban|legalize|illegal)", re.I)
+OUTWEIGH_PAT = re.compile(r"advantages?\s+outweigh\s+disadvantages?", re.I)
+OUTWEIGHED_PAT = re.compile(r"disadvantages?\s+outweigh\s+advantages?", re.I)
+
+# Every essay cue by name. A cue can only match if one of its keywords occurs
+# in the lower-cased text, so KEYWORD_RE (a plain literal alternation, which
+# re scans at C speed, unlike the IGNORECASE cue patterns) finds the candidate
+# cues in one pass and only those are confirmed with their full pattern.
+CUE_PATS = {
+    "disagree": DISAGREE_PAT,
+    "agree": AGREE_PAT,
+    "should_not": SHOULD_NOT_PAT,
+    "should": SHOULD_PAT,
+    "positive": POSITIVE_PAT,
+    "negative": NEGATIVE_PAT,
+    "good_idea": GOOD_IDEA_PAT,
+    "bad_idea": BAD_IDEA_PAT,
+    "allow": ALLOW_PAT,
+    "ban": BAN_PAT,
+    "outweigh": OUTWEIGH_PAT,
+    "outweighed": OUTWEIGHED_PAT,
+}
+CUE_KEYWORDS = {
+    "disagree": ("disagree",),
+    "agree": ("agree",),
+    "should_not": ("should",),
+    "should": ("should",),
+    "positive": ("positive", "beneficial", "good", "advantage"),
+    "negative": ("negative", "harmful", "bad", "disadvantage"),
+    "good_idea": ("good",),
+    "bad_idea": ("bad",),
+    "allow": ("allow", "legali"),
+    "ban": ("ban", "illegal", "prohibit", "forbid"),
+    "outweigh": ("outweigh",),
+    "outweighed": ("outweigh",),
+}
+_KEYWORD_CUES: Dict[str, Set[str]] = {}
+for _cue, _keywords in CUE_KEYWORDS.items():
+    for _kw in _keywords:
+        _KEYWORD_CUES.setdefault(_kw, set()).add(_cue)
+# Longest first so "disagree" / "disadvantage" win over their suffixes; cues
+# nested in a longer keyword need a word boundary there, so none are lost
+KEYWORD_RE = re.compile("|".join(sorted(_KEYWORD_CUES, key=len, reverse=True)))
+
 
 def load_essay_texts(zip_path):
-    texts = {}
-    with zipfile.ZipFile(zip_path) as zf:
-        txt_files = [p for p in zf.namelist() if p.lower().endswith(".txt")]
-        for p in txt_files:
-            base = os.path.basename(p)
-            try:
-                content = zf.read(p).decode("utf-8", errors="ignore")
-            except KeyError:
-                continue
-            texts[base] = content
-    return texts
+    corpus = load_corpus(zip_path)
+    return {f"{eid}.txt": corpus.texts[i] for i, eid in enumerate(corpus.essay_ids)}
 
 
 def load_claim_texts(zip_path) -> Dict[str, List[str]]:
+    corpus = load_corpus(zip_path)
     claims: Dict[str, List[str]] = {}
-    with zipfile.ZipFile(zip_path) as zf:
-        ann_files = [p for p in zf.namelist() if p.lower().endswith(".ann")]
-        for p in ann_files:
-            base = os.path.basename(p)
-            try:
-                content = zf.read(p).decode("utf-8", errors="ignore")
-            except KeyError:
-                continue
-            claim_texts: List[str] = []
-            for line in content.splitlines():
-                line = line.strip()
-                if not line or not line.startswith("T"):
-                    continue
-                try:
-                    tid, rest = line.split("\t", 1)
-                    label_span, text = rest.split("\t", 1)
-                except ValueError:
-                    continue
-                label = label_span.split()[0].lower()
-                if label in {"claim", "majorclaim"}:
-                    claim_texts.append(text)
-            claims[base] = claim_texts
+    for i in range(len(corpus)):
+        claims[corpus.ann_name(i)] = [
+            text
+            for _, label, _, _, text in corpus.component_records(i)
+            if label.lower() in {"claim", "majorclaim"}
+        ]
     return claims
 
 
+# Claims + body cues checked after agree/disagree, in order; the first that
+# matches decides. Prompt-specific pairs are appended by ``prompt_rules``.
+GENERIC_RULES = (("should_not", "con"), ("should", "pro"))
+
+
+@functools.lru_cache(maxsize=None)
+def prompt_rules(prompt: str) -> Tuple[Tuple[str, str], ...]:
+    """Ordered ``(cue, stance)`` rules for ``prompt``; computed once per distinct prompt."""
+    rules = list(GENERIC_RULES)
+    # Positive/negative trend prompts
+    if TREND_PROMPT_PAT.search(prompt):
+        rules += [("positive", "pro"), ("negative", "con")]
+    # Good/bad idea prompts
+    if IDEA_PROMPT_PAT.search(prompt) or IDEA_QUESTION_PAT.search(prompt):
+        rules += [("good_idea", "pro"), ("bad_idea", "con")]
+    # Allow vs ban prompts
+    if ALLOW_BAN_PROMPT_PAT.search(prompt):
+        rules += [("allow", "pro"), ("ban", "con")]
+    # Advantages outweigh disadvantages prompts
+    if OUTWEIGH_PAT.search(prompt):
+        rules += [("outweigh", "pro"), ("outweighed", "con")]
+    return tuple(rules)
+
+
+def candidate_cues(combined: str, body_start: int) -> Tuple[Set[str], Set[str]]:
+    """Cues that may match ``(in the essay body, anywhere in combined)``, from one keyword pass.
+
+    The body is the tail of ``combined`` starting at ``body_start``.
+    """
+    if not combined.isascii():
+        # Unicode case folding can match a keyword lower() would not produce
+        return set(CUE_PATS), set(CUE_PATS)
+    in_text: Set[str] = set()
+    in_combined: Set[str] = set()
+    for m in KEYWORD_RE.finditer(combined.lower()):
+        cues = _KEYWORD_CUES[m.group()]
+        in_combined |= cues
+        if m.start() >= body_start:
+            in_text |= cues
+    return in_text, in_combined
+
+
 def infer_stance(text: str, prompt: str, claim_texts: List[str]) -> str:
     if not text:
         return ""
-    # Primary cues: explicit agree/disagree
-    if DISAGREE_PAT.search(text):
-        return "con"
-    if AGREE_PAT.search(text):
-        return "pro"
     # Consider claims (often clearer than body)
     combined = " \n ".join(claim_texts + [text])
-    t = combined.lower()
-
-    # Generic should/should not
-    if SHOULD_NOT_PAT.search(combined):
+    in_text, in_combined = candidate_cues(combined, len(combined) - len(text))
+    # Primary cues: explicit agree/disagree
+    if "disagree" in in_text and DISAGREE_PAT.search(text):
         return "con"
-    if SHOULD_PAT.search(combined):
+    if "agree" in in_text and AGREE_PAT.search(text):
         return "pro"
+    for cue, stance in prompt_rules(prompt):
+        if cue in in_combined and CUE_PATS[cue].search(combined):
+            return stance
+    return ""
 
-    # Positive/negative trend prompts
-    if re.search(r"positive\s+trend|good\s+thing", prompt, re.I):
-        if POSITIVE_PAT.search(combined):
-            return "pro"
-        if NEGATIVE_PAT.search(combined):
-            return "con"
 
-    # Good/bad idea prompts
-    if re.search(r"good\s+idea|bad\s+idea", prompt, re.I) or re.search(r"Do you think.*good idea", prompt, re.I):
-        if GOOD_IDEA_PAT.search(combined):
-            return "pro"
-        if BAD_IDEA_PAT.search(combined):
-            return "con"
+def infer_stances(items: Iterable[Tuple[str, str, List[str]]]) -> List[str]:
+    """``infer_stance`` for each ``(text, prompt, claim_texts)``.
 
-    # Allow vs ban prompts
-    if re.search(r"(allow|ban|legalize|illegal)", prompt, re.I):
-        if ALLOW_PAT.search(combined):
-            return "pro"
-        if BAN_PAT.search(combined):
-            return "con"
+    Prompt rules are reused across essays only through ``prompt_rules``' cache.
+    """
+    return [infer_stance(text, prompt, claims) for text, prompt, claims in items]
 
-    # Advantages outweigh disadvantages prompts
-    if re.search(r"advantages?\s+outweigh\s+disadvantages?", prompt, re.I):
-        if re.search(r"advantages?\s+outweigh\s+disadvantages?", combined, re.I):
-            return "pro"
-        if re.search(r"disadvantages?\s+outweigh\s+advantages?", combined, re.I):
-            return "con"
-
-    return ""
 
+def main(argv: Optional[List[str]] = None):
+    argparse.ArgumentParser(description="Fill in unlabeled stances in stance_labels.csv").parse_args(argv)
+    with perf.stage("load"):
+        texts = load_essay_texts(AAEC_ZIP_PATH)
+        claims_by_ann = load_claim_texts(AAEC_ZIP_PATH)
+        rows = []
+        with open(STANCE_CSV, newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            for r in reader:
+                rows.append(r)
 
-def main():
-    texts = load_essay_texts(AAEC_ZIP_PATH)
-    claims_by_ann = load_claim_texts(AAEC_ZIP_PATH)
-    rows = []
-    with open(STANCE_CSV, newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            rows.append(r)
-
-    updated = 0
+    todo = []
     for r in rows:
         if (r.get('stance') or '').strip():
+            perf.count("rows_already_labeled")
             continue
         essay_id = (r.get('essay_id') or '').strip()
-        prompt = (r.get('topic') or '').strip()
-        if not essay_id:
-            continue
+        if essay_id:
+            todo.append(r)
+    items = []
+    for r in todo:
+        essay_id = r['essay_id'].strip()
         txt_name = essay_id.replace('.ann', '.txt')
-        text = texts.get(txt_name, '')
-        claim_texts = claims_by_ann.get(essay_id, [])
-        stance = infer_stance(text, prompt, claim_texts)
+        items.append((texts.get(txt_name, ''), (r.get('topic') or '').strip(), claims_by_ann.get(essay_id, [])))
+
+    updated = 0
+    with perf.stage("metrics"):
+        stances = infer_stances(items)
+    for r, stance in zip(todo, stances):
         if stance:
             r['stance'] = stance
             updated += 1
+    perf.count("rows_labeled", updated)
+    perf.count("rows_undecided", len(todo) - updated)
 
     fieldnames = ['essay_id', 'topic', 'stance']
-    with open(STANCE_CSV, 'w', newline='', encoding='utf-8') as f:
+    with perf.stage("write"), open(STANCE_CSV, 'w', newline='', encoding='utf-8') as f:
         writer = csv.DictWriter(f, fieldnames=fieldnames)
         writer.writeheader()
         for r in rows:
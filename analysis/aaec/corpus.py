@@ -0,0 +1,489 @@
+"""Shared loader for the AAEC BRAT corpus (``brat-project-final``).
+
+Every essay is parsed once into compact, array-backed tables:
+
+* essays:      id, essay text, offsets into the component / relation tables,
+               For / Against claim counts aggregated while parsing
+* components:  essay index, label code, T number, character and UTF-8 byte
+               span, ``Stance`` attribute (+1 For / -1 Against / 0 none)
+* relations:   essay index, type code, R number, T numbers and component rows
+
+The tables are cached as a memory-mapped column file (``analysis/columnar.py``)
+under ``analysis_outputs/cache/`` and rebuilt only when the source zip or
+directory changes. Zip sources are read through ``analysis.zipstore`` (a
+memory-mapped member-offset index), so building never extracts the archive.
+Component text is not stored separately: the BRAT character offsets are
+translated to byte offsets once, and each span is decoded lazily from a
+zero-copy view of the essay body.
+"""
+
+import array
+import hashlib
+import os
+import re
+import zipfile
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from analysis import perf
+from analysis.columnar import ColumnFile, pack_strings, read_header, write_columns
+from analysis.paths import CACHE_DIR, data_path
+from analysis.zipstore import ZipStore
+
+
+AAEC_ZIP_PATH = data_path("ArgumentAnnotatedEssays-2.0/brat-project-final.zip")
+AAEC_DIR_PATH = data_path("ArgumentAnnotatedEssays-2.0/brat-project-final")
+
+# Bump when the table layout or parsing rules change so stale caches rebuild.
+FORMAT_VERSION = 4
+
+# Seed vocabularies so the common codes are stable across builds; unseen
+# labels / relation types are appended and recorded in the file metadata.
+LABELS = ("MajorClaim", "Claim", "Premise")
+RELATION_TYPES = ("supports", "attacks")
+
+RELATION_RE = re.compile(r"(\w+)\s+Arg1:T(\d+)\s+Arg2:T(\d+)")
+
+# BRAT ``Stance`` attribute values (``annotation.conf``: Arg:Claim, Value:For|Against).
+# They give a claim's stance toward the essay's major claim, not toward the prompt.
+STANCE_CODES = {"For": 1, "Against": -1}
+STANCE_NAMES = {1: "For", -1: "Against", 0: ""}
+
+
+def iter_ann_records(content: str) -> Iterator[Tuple]:
+    """Yield parsed BRAT lines.
+
+    ``("T", t_num, label, start, end, text)`` for text-bound components,
+    ``("R", r_num, rtype, arg1_t_num, arg2_t_num)`` for relations and
+    ``("A", a_num, name, t_num, value)`` for attributes (``value`` is ``""`` for
+    binary attributes). Malformed lines are skipped and counted as
+    ``ann_lines_skipped``.
+    """
+    for line in content.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("T"):
+            # Example: T1	Claim 10 25	text
+            try:
+                tid, rest = line.split("\t", 1)
+                label_span, text = rest.split("\t", 1)
+                t_num = int(tid[1:])
+            except ValueError:
+                perf.count("ann_lines_skipped")
+                continue
+            parts = label_span.split()
+            try:
+                # Discontinuous spans ("0 5;7 10") keep their outer bounds
+                start, end = int(parts[1].split(";")[0]), int(parts[-1].split(";")[-1])
+            except (IndexError, ValueError):
+                start = end = -1
+            yield ("T", t_num, parts[0], start, end, text)
+        elif line.startswith("R"):
+            # Example: R1	supports Arg1:T2 Arg2:T1
+            try:
+                rid, rest = line.split("\t", 1)
+                r_num = int(rid[1:])
+            except ValueError:
+                perf.count("ann_lines_skipped")
+                continue
+            m = RELATION_RE.match(rest)
+            if m:
+                yield ("R", r_num, m.group(1), int(m.group(2)), int(m.group(3)))
+            else:
+                perf.count("ann_lines_skipped")
+        elif line.startswith("A"):
+            # Example: A1	Stance T3 For
+            try:
+                aid, rest = line.split("\t", 1)
+                a_num = int(aid[1:])
+                parts = rest.split()
+                t_num = int(parts[1][1:])
+            except (IndexError, ValueError):
+                perf.count("ann_lines_skipped")
+                continue
+            if parts[1].startswith("T"):
+                yield ("A", a_num, parts[0], t_num, parts[2] if len(parts) > 2 else "")
+            else:
+                perf.count("ann_lines_skipped")
+
+
+def parse_ann(content: str) -> Tuple[Dict[str, Dict], List[Tuple[str, str, str]]]:
+    """Parse one ``.ann`` file into ``({tid: {label, text}}, [(type, arg1, arg2)])``.
+
+    Components with a ``Stance`` attribute also get ``"stance": "For" | "Against"``.
+    """
+    components: Dict[str, Dict] = {}
+    relations: List[Tuple[str, str, str]] = []
+    stances: List[Tuple[str, str]] = []
+    for rec in iter_ann_records(content):
+        if rec[0] == "T":
+            components[f"T{rec[1]}"] = {"label": rec[2], "text": rec[5]}
+        elif rec[0] == "R":
+            relations.append((rec[2], f"T{rec[3]}", f"T{rec[4]}"))
+        elif rec[2] == "Stance":
+            stances.append((f"T{rec[3]}", rec[4]))
+    for tid, value in stances:
+        if tid in components:
+            components[tid]["stance"] = value
+    return components, relations
+
+
+def _is_essay_member(name: str, suffix: str) -> bool:
+    base = os.path.basename(name)
+    return name.lower().endswith(suffix) and not name.startswith("__MACOSX/") and not base.startswith("._")
+
+
+Buffer = Union[bytes, memoryview]
+
+
+def iter_essay_sources(source: str, index_path: Optional[str] = None) -> Iterator[Tuple[str, Buffer, Buffer]]:
+    """Yield ``(essay_id, ann_bytes, txt_bytes)`` from a zip or directory, sorted by id.
+
+    Zip members come back as memoryviews that are released when the next
+    essay is requested, so the store can unmap its files at the end.
+    ``index_path`` overrides where the zip's member index is kept.
+    """
+    if zipfile.is_zipfile(source):
+        with ZipStore(source, index_path) as store:
+            for ann in sorted(n for n in store.names if _is_essay_member(n, ".ann")):
+                txt = ann[:-4] + ".txt"
+                ann_view = store.view(ann)
+                txt_view = store.view(txt) if txt in store else memoryview(b"")
+                yield os.path.basename(ann)[:-4], ann_view, txt_view
+                ann_view.release()
+                txt_view.release()
+    else:
+        for fname in sorted(f for f in os.listdir(source) if _is_essay_member(f, ".ann")):
+            stem = fname[:-4]
+            with open(os.path.join(source, fname), "rb") as f:
+                ann_bytes = f.read()
+            txt_path = os.path.join(source, stem + ".txt")
+            txt_bytes = b""
+            if os.path.exists(txt_path):
+                with open(txt_path, "rb") as f:
+                    txt_bytes = f.read()
+            yield stem, ann_bytes, txt_bytes
+
+
+def source_fingerprint(source: str) -> List[int]:
+    """Cheap change detector: (size, mtime) of a zip or (count, newest mtime) of a directory."""
+    if os.path.isdir(source):
+        mtimes = [e.stat().st_mtime_ns for e in os.scandir(source) if e.name.endswith((".ann", ".txt"))]
+        return [len(mtimes), max(mtimes, default=0)]
+    st = os.stat(source)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def default_cache_path(source: str) -> str:
+    digest = hashlib.sha1(os.path.abspath(source).encode("utf-8")).hexdigest()[:10]
+    return os.path.join(CACHE_DIR, f"aaec_corpus_{digest}.col")
+
+
+def _byte_offsets(text: str):
+    """Map character offsets of ``text`` to UTF-8 byte offsets (-1 stays -1)."""
+    if text.isascii():
+        return lambda pos: pos
+    return lambda pos: len(text[:pos].encode("utf-8")) if pos >= 0 else -1
+
+
+def build_corpus(
+    source: str, previous: Optional["Corpus"] = None, index_path: Optional[str] = None
+) -> Tuple[Dict[str, array.array], Dict]:
+    """Parse every essay under ``source`` into column arrays plus metadata.
+
+    When ``previous`` (an older build of the same source) is given, essays whose
+    id and ``.ann`` hash are unchanged are copied from it instead of re-parsed.
+    """
+    labels = list(LABELS)
+    rel_types = list(RELATION_TYPES)
+    label_codes = {l: i for i, l in enumerate(labels)}
+    rel_codes = {r: i for i, r in enumerate(rel_types)}
+
+    essay_ids: List[str] = []
+    ann_hashes: List[str] = []
+    texts: List[str] = []
+    essay_comp = array.array("q", [0])
+    essay_rel = array.array("q", [0])
+    essay_for, essay_against = array.array("i"), array.array("i")
+    comp_essay, comp_label, comp_tid = array.array("i"), array.array("b"), array.array("i")
+    comp_start, comp_end = array.array("i"), array.array("i")
+    comp_bstart, comp_bend = array.array("i"), array.array("i")
+    comp_stance = array.array("b")
+    rel_essay, rel_type, rel_rid = array.array("i"), array.array("b"), array.array("i")
+    rel_arg1, rel_arg2 = array.array("i"), array.array("i")
+    rel_src, rel_dst = array.array("i"), array.array("i")
+
+    reusable: Dict[Tuple[str, str], int] = {}
+    if previous is not None:
+        reusable = {(eid, h): i for i, (eid, h) in enumerate(zip(previous.essay_ids, previous.ann_hashes))}
+    reparsed = 0
+
+    for e_idx, (essay_id, ann_bytes, txt_bytes) in enumerate(iter_essay_sources(source, index_path)):
+        ann_hash = hashlib.sha1(ann_bytes).hexdigest()
+        essay_ids.append(essay_id)
+        ann_hashes.append(ann_hash)
+        text = str(txt_bytes, "utf-8", "replace")
+        texts.append(text)
+
+        old = reusable.get((essay_id, ann_hash))
+        if old is not None:
+            comp_base = len(comp_essay) - previous.essay_comp[old]
+            for row in previous.component_rows(old):
+                label = previous.labels[previous.comp_label[row]]
+                if label not in label_codes:
+                    label_codes[label] = len(labels)
+                    labels.append(label)
+                comp_essay.append(e_idx)
+                comp_label.append(label_codes[label])
+                comp_tid.append(previous.comp_tid[row])
+                comp_start.append(previous.comp_start[row])
+                comp_end.append(previous.comp_end[row])
+                comp_bstart.append(previous.comp_bstart[row])
+                comp_bend.append(previous.comp_bend[row])
+                comp_stance.append(previous.comp_stance[row])
+            for row in previous.relation_rows(old):
+                rtype = previous.relation_types[previous.rel_type[row]]
+                if rtype not in rel_codes:
+                    rel_codes[rtype] = len(rel_types)
+                    rel_types.append(rtype)
+                src, dst = previous.rel_src[row], previous.rel_dst[row]
+                rel_essay.append(e_idx)
+                rel_type.append(rel_codes[rtype])
+                rel_rid.append(previous.rel_rid[row])
+                rel_arg1.append(previous.rel_arg1[row])
+                rel_arg2.append(previous.rel_arg2[row])
+                rel_src.append(src + comp_base if src >= 0 else -1)
+                rel_dst.append(dst + comp_base if dst >= 0 else -1)
+            essay_comp.append(len(comp_essay))
+            essay_rel.append(len(rel_essay))
+            essay_for.append(previous.essay_for[old])
+            essay_against.append(previous.essay_against[old])
+            perf.count("essays_reused")
+            continue
+
+        reparsed += 1
+        perf.count("essays_parsed")
+        row_of: Dict[int, int] = {}
+        pending: List[Tuple] = []
+        attributes: List[Tuple] = []
+        byte_offset = _byte_offsets(text)
+        for rec in iter_ann_records(str(ann_bytes, "utf-8", "ignore")):
+            if rec[0] == "T":
+                _, t_num, label, start, end, _text = rec
+                if label not in label_codes:
+                    label_codes[label] = len(labels)
+                    labels.append(label)
+                row_of[t_num] = len(comp_essay)
+                comp_essay.append(e_idx)
+                comp_label.append(label_codes[label])
+                comp_tid.append(t_num)
+                comp_start.append(start)
+                comp_end.append(end)
+                comp_bstart.append(byte_offset(start))
+                comp_bend.append(byte_offset(end))
+                comp_stance.append(0)
+            elif rec[0] == "R":
+                pending.append(rec)
+            elif rec[2] == "Stance":
+                attributes.append(rec)
+        # Relations and attributes are resolved after all components so forward references work
+        n_for = n_against = 0
+        for _, _, _, t_num, value in attributes:
+            row = row_of.get(t_num)
+            code = STANCE_CODES.get(value, 0)
+            if row is None or not code:
+                perf.count("stance_attributes_dropped")
+                continue
+            comp_stance[row] = code
+            if code > 0:
+                n_for += 1
+            else:
+                n_against += 1
+        for _, r_num, rtype, arg1, arg2 in pending:
+            if rtype not in rel_codes:
+                rel_codes[rtype] = len(rel_types)
+                rel_types.append(rtype)
+            rel_essay.append(e_idx)
+            rel_type.append(rel_codes[rtype])
+            rel_rid.append(r_num)
+            rel_arg1.append(arg1)
+            rel_arg2.append(arg2)
+            rel_src.append(row_of.get(arg1, -1))
+            rel_dst.append(row_of.get(arg2, -1))
+            if arg1 not in row_of or arg2 not in row_of:
+                perf.count("relations_unresolved")
+        essay_comp.append(len(comp_essay))
+        essay_rel.append(len(rel_essay))
+        essay_for.append(n_for)
+        essay_against.append(n_against)
+
+    id_blob, id_offsets = pack_strings(essay_ids)
+    hash_blob, hash_offsets = pack_strings(ann_hashes)
+    text_blob, text_offsets = pack_strings(texts)
+    columns = {
+        "essay_ids.blob": id_blob,
+        "essay_ids.offsets": id_offsets,
+        "ann_hashes.blob": hash_blob,
+        "ann_hashes.offsets": hash_offsets,
+        "texts.blob": text_blob,
+        "texts.offsets": text_offsets,
+        "essay_comp": essay_comp,
+        "essay_rel": essay_rel,
+        "essay_for": essay_for,
+        "essay_against": essay_against,
+        "comp_essay": comp_essay,
+        "comp_label": comp_label,
+        "comp_tid": comp_tid,
+        "comp_start": comp_start,
+        "comp_end": comp_end,
+        "comp_bstart": comp_bstart,
+        "comp_bend": comp_bend,
+        "comp_stance": comp_stance,
+        "rel_essay": rel_essay,
+        "rel_type": rel_type,
+        "rel_rid": rel_rid,
+        "rel_arg1": rel_arg1,
+        "rel_arg2": rel_arg2,
+        "rel_src": rel_src,
+        "rel_dst": rel_dst,
+    }
+    meta = {"version": FORMAT_VERSION, "labels": labels, "relation_types": rel_types, "reparsed": reparsed}
+    return columns, meta
+
+
+class Corpus:
+    """Read-only view over a cached corpus column file."""
+
+    def __init__(self, cols: ColumnFile):
+        self._cols = cols
+        self.labels: List[str] = cols.meta["labels"]
+        self.relation_types: List[str] = cols.meta["relation_types"]
+        self.essay_ids = cols.strings("essay_ids")
+        # sha1 of each essay's raw .ann bytes, for content-keyed caches
+        self.ann_hashes = cols.strings("ann_hashes")
+        self.texts = cols.strings("texts")
+        for name in cols.names:
+            if "." not in name:
+                setattr(self, name, cols.column(name))
+        self._index: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.essay_ids)
+
+    def index_of(self, name: str) -> int:
+        """Essay index for ``essay001``, ``essay001.ann`` or ``essay001.txt``."""
+        if self._index is None:
+            self._index = {eid: i for i, eid in enumerate(self.essay_ids)}
+        stem = os.path.splitext(os.path.basename(name))[0]
+        return self._index[stem]
+
+    def ann_name(self, i: int) -> str:
+        return f"{self.essay_ids[i]}.ann"
+
+    def component_rows(self, i: int) -> range:
+        return range(self.essay_comp[i], self.essay_comp[i + 1])
+
+    def relation_rows(self, i: int) -> range:
+        return range(self.essay_rel[i], self.essay_rel[i + 1])
+
+    def text_view(self, i: int) -> memoryview:
+        """UTF-8 bytes of essay ``i``'s text, zero-copy over the cache mapping."""
+        return self.texts.view(i)
+
+    def component_view(self, row: int) -> memoryview:
+        """UTF-8 bytes of component ``row``'s span, sliced from its essay without copying."""
+        start = self.comp_bstart[row]
+        if start < 0:
+            return memoryview(b"")
+        return self.text_view(self.comp_essay[row])[start : self.comp_bend[row]]
+
+    def component_text(self, row: int) -> str:
+        """Text of component ``row``; only this span is decoded."""
+        return str(self.component_view(row), "utf-8", "replace")
+
+    def component_stance(self, row: int) -> str:
+        """``"For"`` / ``"Against"`` from the component's ``Stance`` attribute, else ``""``."""
+        return STANCE_NAMES[self.comp_stance[row]]
+
+    def essay_stance(self, i: int) -> str:
+        """Majority ``Stance`` of essay ``i``'s claims toward its major claim (``""`` on a tie).
+
+        Counted during the single parse pass, so this is a lookup. Because the
+        attribute is relative to the essay's own thesis, ``"Against"`` marks an
+        essay built mostly from counter-claims, not a con essay on the prompt.
+        """
+        n_for, n_against = self.essay_for[i], self.essay_against[i]
+        if n_for == n_against:
+            return ""
+        return "For" if n_for > n_against else "Against"
+
+    def component_records(self, i: int, with_text: bool = True) -> Iterator[Tuple[str, str, int, int, Optional[str]]]:
+        """Yield ``(tid, label, start, end, text)`` for every component of essay ``i``.
+
+        ``text`` is ``None`` when ``with_text`` is false, so callers that only
+        need labels and spans never decode the essay.
+        """
+        for row in self.component_rows(i):
+            yield (
+                f"T{self.comp_tid[row]}",
+                self.labels[self.comp_label[row]],
+                self.comp_start[row],
+                self.comp_end[row],
+                self.component_text(row) if with_text else None,
+            )
+
+    def relation_records(self, i: int) -> Iterator[Tuple[str, str, str, str]]:
+        """Yield ``(rid, type, arg1_tid, arg2_tid)`` for every relation of essay ``i``."""
+        for row in self.relation_rows(i):
+            yield (
+                f"R{self.rel_rid[row]}",
+                self.relation_types[self.rel_type[row]],
+                f"T{self.rel_arg1[row]}",
+                f"T{self.rel_arg2[row]}",
+            )
+
+    def components(self, i: int, with_text: bool = True) -> Dict[str, Dict]:
+        """Essay ``i`` in the ``parse_ann`` component shape (``text`` omitted unless ``with_text``)."""
+        if not with_text:
+            return {tid: {"label": label} for tid, label, _, _, _ in self.component_records(i, False)}
+        return {tid: {"label": label, "text": text} for tid, label, _, _, text in self.component_records(i)}
+
+    def relations(self, i: int) -> List[Tuple[str, str, str]]:
+        """Essay ``i`` in the ``parse_ann`` relation shape."""
+        return [(rtype, a1, a2) for _, rtype, a1, a2 in self.relation_records(i)]
+
+    def close(self) -> None:
+        self._cols.close()
+
+
+def load_corpus(
+    source: str = AAEC_ZIP_PATH, cache_path: Optional[str] = None, rebuild: bool = False, index_path: Optional[str] = None
+) -> Corpus:
+    """Load the corpus from its column cache, (re)building the cache if stale.
+
+    ``cache_path`` and ``index_path`` (the zip member index) default to files
+    under ``CACHE_DIR`` named after ``source``.
+    """
+    source = os.path.abspath(source)
+    cache_path = cache_path or default_cache_path(source)
+    fingerprint = source_fingerprint(source)
+    meta: Dict = {}
+    if os.path.exists(cache_path):
+        try:
+            meta = read_header(cache_path).get("meta", {})
+        except (OSError, ValueError):
+            meta = {}
+    if rebuild or meta.get("version") != FORMAT_VERSION or meta.get("fingerprint") != fingerprint:
+        # Reuse the parsed rows of unchanged essays from a same-layout cache
+        previous = Corpus(ColumnFile(cache_path)) if meta.get("version") == FORMAT_VERSION and not rebuild else None
+        try:
+            with perf.stage("parse"):
+                columns, meta = build_corpus(source, previous, index_path)
+        finally:
+            if previous is not None:
+                previous.close()
+        meta["source"] = source
+        meta["fingerprint"] = fingerprint
+        with perf.stage("write_cache"):
+            write_columns(cache_path, columns, meta)
+    return Corpus(ColumnFile(cache_path))
@@ -0,0 +1,111 @@
+"""Persistent, content-addressed cache of per-essay metrics.
+
+Entries are keyed by the sha1 of an essay's raw ``.ann`` bytes, so editing one
+annotation invalidates only that essay. The whole cache is tagged with the
+metric code version; a version bump drops every entry. Each run stamps the
+entries it touches with a run counter, and ``compact`` evicts the least
+recently used entries beyond ``max_entries``.
+"""
+
+import json
+import os
+from typing import Dict, Iterable, Optional
+
+
+class MetricsCache:
+    def __init__(self, path: str, version: int, max_entries: int = 4096):
+        self.path = path
+        self.version = version
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, Dict] = {}
+        self._tick = 0
+        self._dirty = False
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+            if data.get("version") == version:
+                self._entries = data.get("entries", {})
+                self._tick = data.get("tick", 0)
+            else:
+                self._dirty = True
+        self._tick += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get(self, key: str) -> Optional[Dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if entry["used"] != self._tick:
+            entry["used"] = self._tick
+            self._dirty = True
+        return entry["metrics"]
+
+    def put(self, key: str, metrics: Dict) -> None:
+        self._entries[key] = {"metrics": metrics, "used": self._tick}
+        self._dirty = True
+
+    def invalidate(self, keys: Optional[Iterable[str]] = None) -> int:
+        """Drop ``keys`` (or every entry when ``None``); returns the number removed."""
+        if keys is None:
+            removed = len(self._entries)
+            self._entries.clear()
+        else:
+            removed = sum(1 for k in set(keys) if self._entries.pop(k, None) is not None)
+        self._dirty = self._dirty or removed > 0
+        return removed
+
+    def compact(self) -> int:
+        """Evict least recently used entries beyond ``max_entries``."""
+        excess = len(self._entries) - self.max_entries
+        if excess <= 0:
+            return 0
+        # Ties on the run counter fall back to key order so eviction is deterministic
+        oldest = sorted(self._entries, key=lambda k: (self._entries[k]["used"], k))[:excess]
+        return self.invalidate(oldest)
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        self.compact()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.version, "tick": self._tick, "entries": self._entries}, f)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+
+def write_patched(path: str, data: bytes) -> int:
+    """Write ``data`` to ``path``, rewriting only the bytes after the first difference.
+
+    Returns the number of bytes written (0 when the file already matches, in
+    which case it is left untouched and keeps its mtime).
+    """
+    if not os.path.exists(path):
+        with open(path, "wb") as f:
+            f.write(data)
+        return len(data)
+    with open(path, "r+b") as f:
+        old = f.read()
+        if old == data:
+            return 0
+        n = min(len(old), len(data))
+        first = next((i for i in range(0, n, 4096) if old[i : i + 4096] != data[i : i + 4096]), n)
+        while first < n and old[first] == data[first]:
+            first += 1
+        f.seek(first)
+        f.write(data[first:])
+        f.truncate()
+    return len(data) - first
@@ -1,33 +1,29 @@
-import csv
+import argparse
 import json
 import os
+import sys
 from collections import defaultdict, Counter
+from typing import List, Optional
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
-ARGKP_CSV = os.path.abspath(
-    os.path.join(
-        os.path.dirname(__file__),
-        "../../dataset/IBM_Debater_(R)_ArgKP-2021/ArgKP-2021_dataset.csv",
-    )
-)
+from analysis import perf  # noqa: E402
+from analysis.argkp.reader import iter_argkp  # noqa: E402
+from analysis.paths import OUTPUT_DIR, output_path  # noqa: E402
 
 
-def analyze_argkp(csv_path: str):
+def analyze_argkp(csv_path: Optional[str] = None):
+    """Per-topic pair/match counts. ``csv_path`` may be the CSV or the dataset zip (default)."""
     topic_to_counts = defaultdict(lambda: Counter())
     stance_to_counts = Counter()
     total_rows = 0
-    with open(csv_path, newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            total_rows += 1
-            topic = row.get('topic', 'UNKNOWN')
-            stance = row.get('stance', '')
-            label = row.get('label', '')  # 1 matching / 0 non-matching
-            topic_to_counts[topic]['pairs'] += 1
-            if label == '1':
-                topic_to_counts[topic]['matches'] += 1
-            if stance:
-                stance_to_counts[stance] += 1
+    for row in iter_argkp(csv_path):
+        total_rows += 1
+        topic_to_counts[row.topic]['pairs'] += 1
+        if row.label == 1:  # 1 matching / 0 non-matching
+            topic_to_counts[row.topic]['matches'] += 1
+        if row.stance:
+            stance_to_counts[str(row.stance)] += 1
 
     summary = {
         "total_pairs": total_rows,
@@ -44,13 +40,14 @@ def analyze_argkp(csv_path: str):
     return summary
 
 
-def main():
-    os.makedirs(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../analysis_outputs")), exist_ok=True)
-    out_path = os.path.abspath(
-        os.path.join(os.path.dirname(__file__), "../../analysis_outputs/argkp_summary.json")
-    )
-    summary = analyze_argkp(ARGKP_CSV)
-    with open(out_path, 'w', encoding='utf-8') as f:
+def main(argv: Optional[List[str]] = None):
+    argparse.ArgumentParser(description="Summary statistics of the ArgKP-2021 dataset").parse_args(argv)
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    out_path = output_path("argkp_summary.json")
+    with perf.stage("aggregate"):
+        summary = analyze_argkp()
+    perf.count("pairs_read", summary["total_pairs"])
+    with perf.stage("write"), open(out_path, 'w', encoding='utf-8') as f:
         json.dump(summary, f, indent=2)
     print(f"Wrote ArgKP summary to {out_path}")
 
@@ -1,93 +1,64 @@
-import csv
+import argparse
+import array
 import json
 import os
 import random
-from typing import List, Tuple
+import sys
+from typing import List, Optional, Tuple
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
-ARGKP_CSV = os.path.abspath(
-    os.path.join(
-        os.path.dirname(__file__),
-        "../../dataset/IBM_Debater_(R)_ArgKP-2021/ArgKP-2021_dataset.csv",
-    )
-)
+from analysis import perf  # noqa: E402
+from analysis.argkp.reader import iter_argkp  # noqa: E402
+from analysis.argkp.scoring import TermMatrix, jaccard_scores  # noqa: E402
+from analysis.paths import OUTPUT_DIR, output_path  # noqa: E402
+from analysis.thresholds import best_threshold, metrics_at, pr_curve  # noqa: E402
 
-STOPWORDS = set(
-    "a an the and or for of on in at to with by is are was were be being been it this that these those from as not no".split()
-)
 
-
-def tokenize(s: str) -> List[str]:
-    return [t for t in ''.join(c.lower() if c.isalnum() else ' ' for c in s).split() if t and t not in STOPWORDS]
-
-
-def jaccard(a: List[str], b: List[str]) -> float:
-    sa, sb = set(a), set(b)
-    if not sa and not sb:
-        return 0.0
-    return len(sa & sb) / max(1, len(sa | sb))
-
-
-def load_pairs(csv_path: str, max_rows: int = 5000) -> List[Tuple[str, str, int]]:
-    rows = []
-    with open(csv_path, newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            arg = row.get('argument', '')
-            kp = row.get('key_point', '')
-            label = 1 if row.get('label', '0') == '1' else 0
-            rows.append((arg, kp, label))
+def load_pairs(csv_path: Optional[str] = None, max_rows: Optional[int] = None) -> List[Tuple[str, str, int]]:
+    rows = [(row.argument, row.key_point, row.label) for row in iter_argkp(csv_path)]
     random.seed(42)
     random.shuffle(rows)
     return rows[:max_rows]
 
 
-def evaluate(threshold: float, data: List[Tuple[str, str, int]]):
-    tp = fp = tn = fn = 0
-    for arg, kp, label in data:
-        s = jaccard(tokenize(arg), tokenize(kp))
-        pred = 1 if s >= threshold else 0
-        if pred == 1 and label == 1:
-            tp += 1
-        elif pred == 1 and label == 0:
-            fp += 1
-        elif pred == 0 and label == 0:
-            tn += 1
-        else:
-            fn += 1
-    precision = tp / (tp + fp) if (tp + fp) else 0.0
-    recall = tp / (tp + fn) if (tp + fn) else 0.0
-    f1 = (2 * precision * recall) / (precision + recall) if (precision + recall) else 0.0
-    acc = (tp + tn) / max(1, (tp + tn + fp + fn))
-    return {"precision": precision, "recall": recall, "f1": f1, "accuracy": acc}
+def score_pairs(data: List[Tuple[str, str, int]]) -> array.array:
+    """Jaccard score of every pair; each distinct text is tokenized once."""
+    matrix = TermMatrix()
+    args = matrix.add_all(arg for arg, _, _ in data)
+    kps = matrix.add_all(kp for _, kp, _ in data)
+    return jaccard_scores(matrix, args, kps)
 
 
-def main():
-    data = load_pairs(ARGKP_CSV, max_rows=5000)
+def main(argv: Optional[List[str]] = None):
+    argparse.ArgumentParser(description="Token-overlap baseline for ArgKP argument/key-point matching").parse_args(argv)
+    with perf.stage("load"):
+        data = load_pairs()
+    perf.count("pairs_read", len(data))
+    with perf.stage("metrics"):
+        scores = score_pairs(data)
+    labels = [label for _, _, label in data]
     # simple split
     n = len(data)
     split = int(0.8 * n)
-    train, test = data[:split], data[split:]
-    # tune threshold on train
-    best_t = 0.0
-    best_f1 = -1.0
-    for t in [i / 100 for i in range(1, 51)]:  # 0.01 .. 0.50
-        m = evaluate(t, train)
-        if m["f1"] > best_f1:
-            best_f1 = m["f1"]
-            best_t = t
-    test_metrics = evaluate(best_t, test)
+    # tune threshold on train: exact optimum over every distinct train score
+    with perf.stage("aggregate"):
+        curve = pr_curve(scores[:split], labels[:split])
+        best_t, best = best_threshold(scores[:split], labels[:split], curve=curve)
+        test_metrics = metrics_at(best_t, scores[split:], labels[split:])
     out = {
         "threshold": best_t,
-        "train_f1": best_f1,
+        "train_f1": best["f1"],
         "test_metrics": test_metrics,
-        "n_train": len(train),
-        "n_test": len(test),
+        "n_train": split,
+        "n_test": n - split,
+        "train_pr_curve": [
+            {k: p[k] for k in ("threshold", "precision", "recall", "f1")} for p in curve
+        ],
     }
-    out_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../analysis_outputs"))
-    os.makedirs(out_dir, exist_ok=True)
-    out_path = os.path.join(out_dir, "argkp_baseline.json")
-    with open(out_path, 'w', encoding='utf-8') as f:
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    out_path = output_path("argkp_baseline.json")
+    with perf.stage("write"), open(out_path, 'w', encoding='utf-8') as f:
         json.dump(out, f, indent=2)
     print(f"Wrote ArgKP baseline to {out_path}")
 
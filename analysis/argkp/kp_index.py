@@ -0,0 +1,232 @@
+"""Inverted index over ArgKP key points for argument -> key point retrieval.
+
+Key points are partitioned by ``(topic, stance)``. Within a partition every
+token has a posting list of the key points containing it, so a query only
+touches key points that share at least one token with the argument; those
+are ranked by Jaccard similarity (the same score as ``argkp_baseline``).
+
+The index is persisted as a column file (``analysis/columnar.py``): postings
+are stored CSR-style under sorted ``partition * vocab_size + token`` keys,
+so loading is a memory map plus a small vocabulary dict and lookups bisect
+the key column directly. The file's meta records the tokenizer version and
+the (size, mtime) of the ArgKP source, and ``main`` rebuilds a saved index
+when either no longer matches.
+
+Usage::
+
+    python analysis/argkp/kp_index.py                 # build, save, report recall@k
+    python analysis/argkp/kp_index.py --topic "..." --stance 1 --query "argument text"
+"""
+
+import argparse
+import array
+import bisect
+import heapq
+import os
+import sys
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from analysis.argkp.reader import ArgKPRow, default_source, iter_argkp  # noqa: E402
+from analysis.columnar import ColumnFile, pack_strings, read_header, write_columns  # noqa: E402
+from analysis.paths import CACHE_DIR  # noqa: E402
+from analysis.tokens import TOKENIZER_VERSION, get_tokenizer  # noqa: E402
+
+
+INDEX_PATH = os.path.join(CACHE_DIR, "argkp_kp_index.col")
+
+Query = Tuple[str, str, int]  # (argument, topic, stance)
+
+
+def source_fingerprint(source: str) -> List[int]:
+    """Cheap change detector: (size, mtime) of the ArgKP zip or CSV."""
+    st = os.stat(source)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def index_meta(source: str) -> Dict:
+    """What a saved index must have been built from to be reused."""
+    return {"tokenizer_version": TOKENIZER_VERSION, "fingerprint": source_fingerprint(source)}
+
+
+def is_fresh(path: str, source: str) -> bool:
+    """True if ``path`` is an index built from ``source`` with the current tokenizer."""
+    try:
+        meta = read_header(path).get("meta", {})
+    except (OSError, ValueError):
+        return False
+    return all(meta.get(key) == value for key, value in index_meta(source).items())
+
+
+class KeyPointIndex:
+    def __init__(
+        self,
+        partitions: List[Tuple[str, int]],
+        part_offsets: Sequence[int],
+        key_points: Sequence[str],
+        kp_sizes: Sequence[int],
+        vocab: List[str],
+        post_keys: Sequence[int],
+        post_offsets: Sequence[int],
+        post_kps: Sequence[int],
+    ):
+        self.partitions = partitions
+        self.part_offsets = part_offsets
+        self.key_points = key_points
+        self.kp_sizes = kp_sizes
+        self.vocab = vocab
+        self.post_keys = post_keys
+        self.post_offsets = post_offsets
+        self.post_kps = post_kps
+        self._part_of = {p: i for i, p in enumerate(partitions)}
+        self._token_id = {t: i for i, t in enumerate(vocab)}
+        self._cols: Optional[ColumnFile] = None
+
+    @classmethod
+    def build(cls, rows: Iterable[ArgKPRow]) -> "KeyPointIndex":
+        """Index the distinct key points of each ``(topic, stance)``."""
+        by_part: Dict[Tuple[str, int], Dict[str, None]] = defaultdict(dict)
+        for row in rows:
+            by_part[(row.topic, row.stance)].setdefault(row.key_point)
+        partitions = sorted(by_part)
+        tokenizer = get_tokenizer()
+        vocab: Dict[str, int] = {}
+        key_points: List[str] = []
+        kp_sizes = array.array("i")
+        part_offsets = array.array("q", [0])
+        postings: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        for p, part in enumerate(partitions):
+            for kp in by_part[part]:
+                kp_id = len(key_points)
+                key_points.append(kp)
+                tokens = set(tokenizer.tokens(kp))
+                kp_sizes.append(len(tokens))
+                for tok in tokens:
+                    tid = vocab.setdefault(tok, len(vocab))
+                    postings[(p, tid)].append(kp_id)
+            part_offsets.append(len(key_points))
+        # Composite keys need the final vocabulary size, so encode after the pass
+        v = max(1, len(vocab))
+        post_keys, post_offsets, post_kps = array.array("q"), array.array("q", [0]), array.array("i")
+        for p, tid in sorted(postings):
+            post_keys.append(p * v + tid)
+            post_kps.extend(postings[(p, tid)])
+            post_offsets.append(len(post_kps))
+        return cls(
+            partitions, part_offsets, key_points, kp_sizes, sorted(vocab, key=vocab.get),
+            post_keys, post_offsets, post_kps,
+        )
+
+    def save(self, path: str = INDEX_PATH, meta: Optional[Dict] = None) -> None:
+        kp_blob, kp_offsets = pack_strings(self.key_points)
+        vocab_blob, vocab_offsets = pack_strings(self.vocab)
+        columns = {
+            "key_points.blob": kp_blob,
+            "key_points.offsets": kp_offsets,
+            "vocab.blob": vocab_blob,
+            "vocab.offsets": vocab_offsets,
+            "part_offsets": array.array("q", self.part_offsets),
+            "kp_sizes": array.array("i", self.kp_sizes),
+            "post_keys": array.array("q", self.post_keys),
+            "post_offsets": array.array("q", self.post_offsets),
+            "post_kps": array.array("i", self.post_kps),
+        }
+        header = {"partitions": [list(p) for p in self.partitions]}
+        header.update(meta or {})
+        write_columns(path, columns, header)
+
+    @classmethod
+    def load(cls, path: str = INDEX_PATH) -> "KeyPointIndex":
+        cols = ColumnFile(path)
+        index = cls(
+            [(t, s) for t, s in cols.meta["partitions"]],
+            cols.column("part_offsets"),
+            cols.strings("key_points"),
+            cols.column("kp_sizes"),
+            list(cols.strings("vocab")),
+            cols.column("post_keys"),
+            cols.column("post_offsets"),
+            cols.column("post_kps"),
+        )
+        index._cols = cols
+        return index
+
+    def query(self, argument: str, topic: str, stance: int, k: int = 5) -> List[Tuple[str, float]]:
+        """Top-``k`` key points of ``(topic, stance)`` for ``argument`` as ``(key_point, jaccard)``."""
+        p = self._part_of.get((topic, stance))
+        if p is None:
+            return []
+        words = set(get_tokenizer().tokens(argument))
+        n_query = len(words)
+        tokens = [self._token_id[w] for w in words if w in self._token_id]
+        v = max(1, len(self.vocab))
+        overlap: Dict[int, int] = defaultdict(int)
+        for tid in tokens:
+            key = p * v + tid
+            j = bisect.bisect_left(self.post_keys, key)
+            if j < len(self.post_keys) and self.post_keys[j] == key:
+                for e in range(self.post_offsets[j], self.post_offsets[j + 1]):
+                    overlap[self.post_kps[e]] += 1
+        scored = (
+            (inter / (n_query + self.kp_sizes[kp] - inter), -kp) for kp, inter in overlap.items()
+        )
+        return [(self.key_points[-neg], score) for score, neg in heapq.nlargest(k, scored)]
+
+    def query_batch(self, queries: Iterable[Query], k: int = 5) -> List[List[Tuple[str, float]]]:
+        """``query`` for many ``(argument, topic, stance)``; repeated arguments are scored once."""
+        seen: Dict[Query, List[Tuple[str, float]]] = {}
+        out = []
+        for q in queries:
+            hits = seen.get(q)
+            if hits is None:
+                hits = seen[q] = self.query(q[0], q[1], q[2], k)
+            out.append(hits)
+        return out
+
+    def close(self) -> None:
+        if self._cols is not None:
+            self._cols.close()
+            self._cols = None
+
+
+def recall_at_k(index: KeyPointIndex, rows: Iterable[ArgKPRow], k: int) -> float:
+    """Share of arguments with a matching key point that get one in their top ``k``."""
+    gold: Dict[Query, set] = defaultdict(set)
+    for row in rows:
+        if row.label == 1:
+            gold[(row.argument, row.topic, row.stance)].add(row.key_point)
+    queries = list(gold)
+    hits = index.query_batch(queries, k)
+    found = sum(1 for q, h in zip(queries, hits) if gold[q] & {kp for kp, _ in h})
+    return found / len(queries) if queries else 0.0
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Build or query the ArgKP key-point index")
+    parser.add_argument("--query", help="argument text to match")
+    parser.add_argument("--topic", help="topic of the argument")
+    parser.add_argument("--stance", type=int, choices=[1, -1], help="stance of the argument")
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--rebuild", action="store_true", help="rebuild even if the saved index is up to date")
+    args = parser.parse_args(argv)
+
+    source, member = default_source()
+    if args.rebuild or not is_fresh(INDEX_PATH, source):
+        KeyPointIndex.build(iter_argkp(source, member)).save(INDEX_PATH, index_meta(source))
+        print(f"Wrote key-point index to {INDEX_PATH}")
+    index = KeyPointIndex.load(INDEX_PATH)
+
+    if args.query:
+        if args.topic is None or args.stance is None:
+            parser.error("--query needs --topic and --stance")
+        for kp, score in index.query(args.query, args.topic, args.stance, args.k):
+            print(f"{score:.3f}  {kp}")
+        return
+    for k in (1, args.k):
+        print(f"recall@{k}: {recall_at_k(index, iter_argkp(), k):.3f}")
+
+
+if __name__ == "__main__":
+    main()
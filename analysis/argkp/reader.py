@@ -0,0 +1,85 @@
+"""Streaming reader for ArgKP-2021, shared by every ArgKP consumer.
+
+Rows come straight out of ``IBM_Debater_(R)_ArgKP-2021.zip`` (an extracted
+``ArgKP-2021_dataset.csv`` is used instead if one exists) as ``ArgKPRow``
+tuples, or as struct-of-arrays ``ArgKPBatch`` chunks.
+"""
+
+import array
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from analysis.paths import data_path
+from analysis.zipcsv import iter_rows, resolve_source
+
+
+ARGKP_ZIP_PATH = data_path("IBM_Debater_(R)_ArgKP-2021.zip")
+ARGKP_MEMBER = "ArgKP-2021_dataset.csv"
+ARGKP_CSV = data_path("IBM_Debater_(R)_ArgKP-2021/ArgKP-2021_dataset.csv")
+
+FIELDS = ("topic", "argument", "key_point", "stance", "label")
+
+
+class ArgKPRow(NamedTuple):
+    topic: str
+    argument: str
+    key_point: str
+    stance: int  # 1 pro / -1 con / 0 missing
+    label: int  # 1 matching / 0 non-matching
+
+
+class ArgKPBatch(NamedTuple):
+    topic: array.array  # uint16 codes into ``topics``
+    argument: List[str]
+    key_point: List[str]
+    stance: array.array  # int8
+    label: array.array  # int8
+    topics: List[str]  # shared, growing vocabulary across batches
+
+
+def _int(value: str) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        return 0
+
+
+def default_source() -> Tuple[str, Optional[str]]:
+    return resolve_source(ARGKP_ZIP_PATH, ARGKP_MEMBER, ARGKP_CSV)
+
+
+def iter_argkp(path: Optional[str] = None, member: Optional[str] = None) -> Iterator[ArgKPRow]:
+    """Yield every (argument, key point) pair. ``path`` may be a CSV or the dataset zip."""
+    if path is None:
+        path, member = default_source()
+    elif member is None and path.lower().endswith(".zip"):
+        member = ARGKP_MEMBER
+    for topic, argument, key_point, stance, label in iter_rows(path, member, FIELDS):
+        yield ArgKPRow(topic, argument, key_point, _int(stance), 1 if label == "1" else 0)
+
+
+def iter_argkp_batches(
+    path: Optional[str] = None, member: Optional[str] = None, batch_size: int = 4096
+) -> Iterator[ArgKPBatch]:
+    """Yield the dataset in column batches of up to ``batch_size`` rows."""
+    topics: List[str] = []
+    codes: Dict[str, int] = {}
+
+    def empty() -> ArgKPBatch:
+        return ArgKPBatch(array.array("H"), [], [], array.array("b"), array.array("b"), topics)
+
+    batch = empty()
+    for row in iter_argkp(path, member):
+        code = codes.get(row.topic)
+        if code is None:
+            code = codes[row.topic] = len(topics)
+            topics.append(row.topic)
+        batch.topic.append(code)
+        batch.argument.append(row.argument)
+        batch.key_point.append(row.key_point)
+        batch.stance.append(row.stance)
+        batch.label.append(row.label)
+        if len(batch.label) >= batch_size:
+            yield batch
+            batch = empty()
+    if batch.label:
+        yield batch
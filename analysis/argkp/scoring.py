@@ -0,0 +1,61 @@
+"""Batch Jaccard scoring over a shared binary term matrix.
+
+Each unique text is tokenized once, through the shared ``analysis.tokens``
+tokenizer. Its row in the term matrix is stored as a Python int used as a
+bitset over the interned token IDs (bit ``j`` set iff token ``j`` occurs), so
+intersections and unions of whole rows are single C-level ``&`` / ``|``
+operations and ``int.bit_count`` gives their sizes. Scoring every
+(argument, key point) pair is then one pass over two row-index arrays.
+"""
+
+import array
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from analysis.tokens import Tokenizer, get_tokenizer
+
+
+def _popcount(x: int) -> int:
+    return bin(x).count("1")
+
+
+popcount = getattr(int, "bit_count", _popcount)
+
+
+class TermMatrix:
+    """Binary document-term matrix with one deduplicated row per distinct text."""
+
+    def __init__(self, tokenizer: Optional[Tokenizer] = None):
+        self.tokenizer = tokenizer or get_tokenizer()
+        self.rows: List[int] = []
+        self.sizes = array.array("i")
+        self._row_of: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def add(self, text: str) -> int:
+        """Row index for ``text``, tokenizing it only the first time it is seen."""
+        row = self._row_of.get(text)
+        if row is not None:
+            return row
+        bits = 0
+        for tid in self.tokenizer.ids(text):
+            bits |= 1 << tid
+        row = self._row_of[text] = len(self.rows)
+        self.rows.append(bits)
+        self.sizes.append(popcount(bits))
+        return row
+
+    def add_all(self, texts: Iterable[str]) -> array.array:
+        return array.array("i", (self.add(t) for t in texts))
+
+
+def jaccard_scores(matrix: TermMatrix, left: Sequence[int], right: Sequence[int]) -> array.array:
+    """Jaccard similarity of rows ``left[k]`` and ``right[k]`` for every k."""
+    rows, sizes = matrix.rows, matrix.sizes
+    scores = array.array("d", bytes(8 * len(left)))
+    for k, (a, b) in enumerate(zip(left, right)):
+        inter = popcount(rows[a] & rows[b])
+        union = sizes[a] + sizes[b] - inter
+        scores[k] = inter / union if union else 0.0
+    return scores
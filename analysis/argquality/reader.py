@@ -0,0 +1,112 @@
+"""Chunked columnar reader for IBM Debater arg-quality-rank-30k.
+
+Rows are streamed straight out of ``IBM_Debater_(R)_arg_quality_rank_30k.zip``
+(an extracted ``arg_quality_rank_30k.csv`` is used instead if one exists) into
+``ArgQualityBatch`` column chunks: topic and split as categorical codes,
+``WA`` / ``MACE-P`` / ``stance_WA_conf`` as float arrays and ``stance_WA`` as
+int8. Only the current batch and the category vocabularies are held.
+"""
+
+import array
+import math
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from analysis.paths import data_path
+from analysis.zipcsv import iter_rows, resolve_source
+
+
+ARG_QUALITY_ZIP_PATH = data_path("IBM_Debater_(R)_arg_quality_rank_30k.zip")
+ARG_QUALITY_MEMBER = "arg_quality_rank_30k.csv"
+ARG_QUALITY_CSV = data_path("IBM_Debater_(R)_arg_quality_rank_30k/arg_quality_rank_30k.csv")
+
+FIELDS = ("argument", "topic", "set", "WA", "MACE-P", "stance_WA", "stance_WA_conf")
+
+
+class ArgQualityBatch(NamedTuple):
+    argument: List[str]
+    topic: array.array  # uint16 codes into ``topics``
+    split: array.array  # int8 codes into ``splits``
+    wa: array.array  # float64, NaN if missing
+    mace_p: array.array  # float64, NaN if missing
+    stance: array.array  # int8: 1 pro / -1 con / 0 missing
+    stance_conf: array.array  # float64, NaN if missing
+    topics: List[str]  # shared, growing vocabulary across batches
+    splits: List[str]  # shared, growing vocabulary across batches
+
+
+def _float(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        return math.nan
+
+
+def _int(value: str) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        return 0
+
+
+def default_source() -> Tuple[str, Optional[str]]:
+    return resolve_source(ARG_QUALITY_ZIP_PATH, ARG_QUALITY_MEMBER, ARG_QUALITY_CSV)
+
+
+def iter_arg_quality_batches(
+    path: Optional[str] = None, member: Optional[str] = None, batch_size: int = 4096
+) -> Iterator[ArgQualityBatch]:
+    """Yield the dataset in column batches of up to ``batch_size`` rows."""
+    if path is None:
+        path, member = default_source()
+    elif member is None and path.lower().endswith(".zip"):
+        member = ARG_QUALITY_MEMBER
+    topics: List[str] = []
+    splits: List[str] = []
+    topic_codes: Dict[str, int] = {}
+    split_codes: Dict[str, int] = {}
+
+    def empty() -> ArgQualityBatch:
+        return ArgQualityBatch(
+            [],
+            array.array("H"),
+            array.array("b"),
+            array.array("d"),
+            array.array("d"),
+            array.array("b"),
+            array.array("d"),
+            topics,
+            splits,
+        )
+
+    batch = empty()
+    for argument, topic, split, wa, mace_p, stance, stance_conf in iter_rows(path, member, FIELDS):
+        code = topic_codes.get(topic)
+        if code is None:
+            code = topic_codes[topic] = len(topics)
+            topics.append(topic)
+        batch.topic.append(code)
+        code = split_codes.get(split)
+        if code is None:
+            code = split_codes[split] = len(splits)
+            splits.append(split)
+        batch.split.append(code)
+        batch.argument.append(argument)
+        batch.wa.append(_float(wa))
+        batch.mace_p.append(_float(mace_p))
+        batch.stance.append(_int(stance))
+        batch.stance_conf.append(_float(stance_conf))
+        if len(batch.argument) >= batch_size:
+            yield batch
+            batch = empty()
+    if batch.argument:
+        yield batch
+
+
+def iter_arguments(path: Optional[str] = None, member: Optional[str] = None) -> Iterator[str]:
+    """Just the argument texts, in file order."""
+    if path is None:
+        path, member = default_source()
+    elif member is None and path.lower().endswith(".zip"):
+        member = ARG_QUALITY_MEMBER
+    for (argument,) in iter_rows(path, member, ["argument"]):
+        yield argument
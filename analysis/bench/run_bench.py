@@ -0,0 +1,180 @@
+"""Scaling benchmarks for the AAEC pipeline over synthetic corpora.
+
+For every size (1k, 10k and 100k essays by default) a seeded corpus is
+written as a zip by ``analysis/bench/synth.py``. Then the stages below are
+timed with ``analysis.perf`` on the same code paths the scripts use:
+
+* ``parse``:      ``load_corpus`` building the column cache from the zip
+* ``metrics``:    ``aaec_analyze.essay_metrics`` for every essay
+* ``features``:   ``experiment2_auto_analysis`` structural features
+* ``stance``:     ``auto_label_stance.infer_stances``
+* ``comparison``: ``aaec_compare_stance.compare_stances`` with resampling
+
+Each stage is judged by its cost per essay, two ways:
+
+* Against the stored baseline (``analysis/bench/baseline.json``) for the
+  same size. A stage more than ``--tolerance`` times slower regressed.
+* Across sizes, which does not depend on the machine. If the per-essay cost
+  at the largest size exceeds ``SCALING_LIMIT`` times the cost at the
+  smallest, the stage grows superlinearly.
+
+Every file the benchmark writes, caches included, stays in its work
+directory. A run that adds or changes anything in ``CACHE_DIR`` is flagged
+as well.
+
+The exit status is 1 if anything is flagged. ``--save-baseline`` records
+the current timings as the new baseline.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+from typing import Dict, List, Optional, Sequence, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from analysis import perf  # noqa: E402
+from analysis.bench.synth import config_args, config_from, write_corpus  # noqa: E402
+from analysis.paths import CACHE_DIR  # noqa: E402
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+SIZES = (1000, 10000, 100000)
+STAGES = ("parse", "metrics", "features", "stance", "comparison")
+TOLERANCE = 2.0
+SCALING_LIMIT = 3.0
+# Stages faster than this at a size are too noisy to judge
+MIN_JUDGED_S = 0.05
+COMPARISON_RESAMPLES = 1000
+
+
+def bench_size(n: int, args: argparse.Namespace, workdir: str) -> Dict[str, float]:
+    """Seconds per stage for one synthetic corpus of ``n`` essays."""
+    # The benchmarked code paths load here, not at import, so --help stays cheap
+    from analysis.aaec.aaec_analyze import essay_metrics
+    from analysis.aaec.aaec_compare_stance import METRIC_KEYS, compare_stances
+    from analysis.aaec.auto_label_stance import infer_stances, prompt_rules
+    from analysis.aaec.corpus import load_corpus
+    from analysis.stats import FeatureMatrix
+    from experiment2_auto_analysis import compute_structural_features, essay_structure
+
+    zip_path = os.path.join(workdir, f"synth_{n}.zip")
+    perf.reset()
+    with perf.stage("generate"):
+        labels = write_corpus(zip_path, config_from(args, n))
+    with perf.stage("parse"):
+        corpus = load_corpus(
+            zip_path,
+            cache_path=os.path.join(workdir, f"synth_{n}.col"),
+            rebuild=True,
+            index_path=os.path.join(workdir, f"synth_{n}_index.col"),
+        )
+    with perf.stage("metrics"):
+        metrics = [
+            dict(essay_metrics(corpus.components(i, with_text=False), corpus.relations(i)), essay_id=corpus.ann_name(i))
+            for i in range(len(corpus))
+        ]
+    with perf.stage("features"):
+        for i in range(len(corpus)):
+            compute_structural_features(*essay_structure(corpus, i))
+    prompt_rules.cache_clear()
+    with perf.stage("stance"):
+        items = []
+        for i, (_, prompt, _) in enumerate(labels):
+            claims = [t for _, label, _, _, t in corpus.component_records(i) if label in ("Claim", "MajorClaim")]
+            items.append((corpus.texts[i], prompt, claims))
+        infer_stances(items)
+    with perf.stage("comparison"):
+        stances = [{"essay_id": e, "topic": p, "stance": s} for e, p, s in labels]
+        compare_stances(FeatureMatrix.from_records(metrics, METRIC_KEYS), stances, n_resamples=COMPARISON_RESAMPLES)
+    corpus.close()
+    sections = perf.snapshot()["sections"]
+    return {name: sections[name]["wall_s"] for name in ("generate",) + STAGES}
+
+
+def cache_listing(cache_dir: str = CACHE_DIR) -> Dict[str, Tuple[int, int]]:
+    """``name -> (size, mtime_ns)`` of the files directly in ``cache_dir``."""
+    if not os.path.isdir(cache_dir):
+        return {}
+    return {e.name: (e.stat().st_size, e.stat().st_mtime_ns) for e in os.scandir(cache_dir) if e.is_file()}
+
+
+def judge(results: Dict[int, Dict[str, float]], baseline: Dict, tolerance: float) -> List[str]:
+    """Human-readable problems: baseline regressions and superlinear scaling."""
+    problems = []
+    base = baseline.get("results", {})
+    for n, stages in results.items():
+        for stage in STAGES:
+            old = base.get(str(n), {}).get(stage)
+            if old is None or stages[stage] < MIN_JUDGED_S:
+                continue
+            if stages[stage] > tolerance * old:
+                problems.append(f"{stage} at {n} essays: {stages[stage]:.2f}s vs baseline {old:.2f}s")
+    sizes = sorted(results)
+    if len(sizes) > 1:
+        lo, hi = sizes[0], sizes[-1]
+        for stage in STAGES:
+            if results[hi][stage] < MIN_JUDGED_S:
+                continue
+            per_lo = max(results[lo][stage], MIN_JUDGED_S) / lo
+            per_hi = results[hi][stage] / hi
+            if per_hi > SCALING_LIMIT * per_lo:
+                problems.append(
+                    f"{stage} scales superlinearly: {per_hi * 1e6:.0f} us/essay at {hi} vs {per_lo * 1e6:.0f} at {lo}"
+                )
+    return problems
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Scaling benchmarks over synthetic BRAT corpora")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="comma-separated essay counts")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="store these timings as the baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="allowed slowdown vs the baseline")
+    parser.add_argument("--keep", metavar="DIR", help="write the corpora to DIR and keep them")
+    config_args(parser)
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    workdir = args.keep or tempfile.mkdtemp(prefix="aaec_bench_")
+    os.makedirs(workdir, exist_ok=True)
+    results: Dict[int, Dict[str, float]] = {}
+    cache_before = cache_listing()
+    try:
+        for n in sizes:
+            results[n] = bench_size(n, args, workdir)
+            cells = "  ".join(f"{s} {results[n][s]:.2f}s ({results[n][s] / n * 1e6:.0f} us)" for s in STAGES)
+            print(f"{n:>7} essays: {cells}", flush=True)
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+    cache_after = cache_listing()
+    touched = sorted(n for n in cache_before.keys() | cache_after.keys() if cache_before.get(n) != cache_after.get(n))
+    if touched:
+        print(f"Benchmark files leaked into {CACHE_DIR}: {', '.join(touched)}")
+        raise SystemExit(1)
+
+    config = {k: v for k, v in config_from(args, 0)._asdict().items() if k != "n_essays"}
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"config": config, "results": {str(n): r for n, r in results.items()}}, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+        return
+
+    baseline = perf.load_json(args.baseline) or {}
+    if baseline.get("config", config) != config:
+        print("Baseline was recorded with a different generator config; only checking scaling")
+        baseline = {}
+    problems = judge(results, baseline, args.tolerance)
+    for p in problems:
+        print(f"REGRESSION: {p}")
+    if problems:
+        raise SystemExit(1)
+    print("No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Start-up time of ``python -m analysis`` against a fixed budget.
+
+Every case runs in a fresh interpreter, ``--repeat`` times, and the median
+wall time is compared with ``BUDGET_MS``. The cases are the ones that should
+never load a dataset reader or matplotlib: the top-level ``--help``,
+``paths`` and each command's own ``--help``. The bare interpreter
+(``python -c pass``) is timed as well, so the report shows how much of the
+budget is the CLI's own imports.
+
+For a case over budget, the slowest imports are listed from ``-X importtime``.
+The exit status is 1 if any case is over budget.
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from typing import List, Optional, Sequence, Tuple
+
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+# The target is "well under 100 ms"; judging at 100 would pass cases right at the edge
+BUDGET_MS = 60.0
+REPEAT = 7
+# Commands whose --help imports their module; run is the pipeline's driver
+HELP_COMMANDS = (
+    "run", "aaec-metrics", "aaec-compare", "argkp-baseline", "argkp-index", "plots", "cmv-trees", "bench", "results"
+)
+SLOWEST_IMPORTS = 8
+
+
+def cases() -> List[Tuple[str, ...]]:
+    return [("--help",), ("paths",)] + [(c, "--help") for c in HELP_COMMANDS]
+
+
+def time_command(argv: Sequence[str], repeat: int = REPEAT) -> float:
+    """Median wall time in ms of ``python <argv>`` in a fresh interpreter."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *argv], cwd=REPO_ROOT, stdout=subprocess.DEVNULL, check=True)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def slowest_imports(argv: Sequence[str], n: int = SLOWEST_IMPORTS) -> List[Tuple[int, str]]:
+    """``(cumulative us, module)`` of the ``n`` most expensive top-level imports."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *argv], cwd=REPO_ROOT, stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE, text=True, check=True,
+    )
+    found = []
+    for line in proc.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package", nesting shown by indentation
+        m = re.match(r"import time:\s+\d+ \|\s+(\d+) \| (\S.*)$", line)
+        if m:
+            found.append((int(m.group(1)), m.group(2)))
+    return sorted(found, reverse=True)[:n]
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Check python -m analysis start-up against its budget")
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS)
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="runs per case; the median is judged")
+    args = parser.parse_args(argv)
+
+    bare = time_command(["-c", "pass"], args.repeat)
+    print(f"{'python -c pass':<40} {bare:7.1f} ms")
+    over = []
+    for case in cases():
+        argv_ = ["-m", "analysis", *case]
+        ms = time_command(argv_, args.repeat)
+        flag = "  OVER BUDGET" if ms > args.budget_ms else ""
+        print(f"{'python -m analysis ' + ' '.join(case):<40} {ms:7.1f} ms{flag}")
+        if flag:
+            over.append(argv_)
+    for argv_ in over:
+        print(f"Slowest imports of {' '.join(argv_)}:")
+        for us, module in slowest_imports(argv_):
+            print(f"  {us / 1000:7.1f} ms  {module}")
+    if over:
+        raise SystemExit(1)
+    print(f"All cases within {args.budget_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Seeded synthetic AAEC-style BRAT corpora for scaling benchmarks.
+
+Each essay gets a prompt line, one major claim, ``claims`` claims with a
+``Stance`` attribute and, under every claim, a premise tree of ``depth``
+levels with ``fanout`` children per node. Each premise supports (or, with
+probability ``attack_rate``, attacks) its parent. With probability
+``cycle_rate`` a claim also "supports" its deepest premise, which closes a
+cycle. ``share_rate`` adds a second parent to a premise, which turns the
+tree into a DAG with many root-to-leaf paths: the case that blows up a
+path-enumerating depth search. Character spans are exact, so the files parse
+like the real ``brat-project-final``.
+
+Essays are paired by topic (pro, con), so the stance comparison has groups
+to work with. Write a corpus with::
+
+    python analysis/bench/synth.py --essays 1000 --out /tmp/synth.zip
+"""
+
+import argparse
+import os
+import random
+import sys
+import zipfile
+from typing import Iterator, List, NamedTuple, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+
+WORDS = (
+    "people students children society government school work family money time city life country "
+    "young old public private technology education health culture travel job skill friend team "
+    "learn help improve reduce spend need think believe provide create develop change support"
+).split()
+TOPICS = (
+    "zoos", "school uniforms", "online classes", "public transport", "space research", "city life",
+    "team sports", "homework", "museums", "tourism", "art education", "fast food", "gap years",
+)
+PROMPTS = (
+    "Should {topic} be allowed?",
+    "Is {topic} a good idea?",
+    "Do you agree or disagree that {topic} is a positive trend?",
+    "Some people think that advantages of {topic} outweigh disadvantages. Do you agree?",
+)
+THESES = {
+    "pro": ("I agree that {topic} is beneficial", "{topic} should be supported"),
+    "con": ("I disagree that {topic} helps anyone", "{topic} should not be allowed"),
+}
+ESSAY_MEMBER_DIR = "brat-project-final"
+
+
+class SynthConfig(NamedTuple):
+    n_essays: int = 1000
+    claims: int = 3
+    depth: int = 2
+    fanout: int = 2
+    attack_rate: float = 0.1
+    cycle_rate: float = 0.0
+    share_rate: float = 0.0
+    seed: int = 0
+
+
+class SynthEssay(NamedTuple):
+    essay_id: str
+    prompt: str
+    stance: str  # "pro" / "con" toward the prompt
+    txt: str
+    ann: str
+
+
+def essay_topic(i: int) -> Tuple[str, str, str]:
+    """``(topic, prompt, stance)`` of essay ``i``; consecutive essays share a prompt with opposite stances."""
+    pair = i // 2
+    topic = f"{TOPICS[pair % len(TOPICS)]} {pair // len(TOPICS)}"
+    return topic, PROMPTS[pair % len(PROMPTS)].format(topic=topic), "pro" if i % 2 == 0 else "con"
+
+
+def _sentence(rng: random.Random) -> str:
+    words = rng.choices(WORDS, k=rng.randint(4, 9))
+    return " ".join(words).capitalize()
+
+
+def synth_essay(i: int, cfg: SynthConfig) -> SynthEssay:
+    # Per-essay seed: any essay can be regenerated on its own, in any order
+    rng = random.Random(cfg.seed * 1_000_003 + i)
+    topic, prompt, stance = essay_topic(i)
+    parts: List[str] = [prompt, "\n\n"]
+    size = len(prompt) + 2
+    t_lines: List[str] = []
+    a_lines: List[str] = []
+    r_lines: List[str] = []
+
+    def component(label: str, text: str) -> int:
+        nonlocal size
+        t_num = len(t_lines) + 1
+        t_lines.append(f"T{t_num}\t{label} {size} {size + len(text)}\t{text}")
+        parts.append(text)
+        parts.append(". ")
+        size += len(text) + 2
+        return t_num
+
+    def relation(kind: str, arg1: int, arg2: int) -> None:
+        r_lines.append(f"R{len(r_lines) + 1}\t{kind} Arg1:T{arg1} Arg2:T{arg2}\t")
+
+    component("MajorClaim", rng.choice(THESES[stance]).format(topic=topic))
+    for _ in range(cfg.claims):
+        parts.append("\n")
+        size += 1
+        claim = component("Claim", _sentence(rng))
+        against = rng.random() < cfg.attack_rate
+        a_lines.append(f"A{len(a_lines) + 1}\tStance T{claim} {'Against' if against else 'For'}")
+        level = [claim]
+        for _ in range(cfg.depth):
+            below = []
+            for parent in level:
+                for _ in range(cfg.fanout):
+                    premise = component("Premise", _sentence(rng))
+                    relation("attacks" if rng.random() < cfg.attack_rate else "supports", premise, parent)
+                    if len(level) > 1 and rng.random() < cfg.share_rate:
+                        other = rng.choice(level)
+                        if other != parent:
+                            relation("supports", premise, other)
+                    below.append(premise)
+            level = below or level
+        if level[0] != claim and rng.random() < cfg.cycle_rate:
+            relation("supports", claim, level[-1])
+    txt = "".join(parts)
+    ann = "\n".join(t_lines + a_lines + r_lines) + "\n"
+    return SynthEssay(f"essay{i + 1:06d}", prompt, stance, txt, ann)
+
+
+def iter_synth_essays(cfg: SynthConfig) -> Iterator[SynthEssay]:
+    for i in range(cfg.n_essays):
+        yield synth_essay(i, cfg)
+
+
+def write_corpus(path: str, cfg: SynthConfig) -> List[Tuple[str, str, str]]:
+    """Write a ``.zip`` (deflated, like the shipped corpus) or a directory of BRAT pairs.
+
+    Returns ``(ann_name, prompt, stance)`` per essay, the shape of ``stance_labels.csv``.
+    """
+    labels: List[Tuple[str, str, str]] = []
+    if path.lower().endswith(".zip"):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+            for essay in iter_synth_essays(cfg):
+                zf.writestr(f"{ESSAY_MEMBER_DIR}/{essay.essay_id}.txt", essay.txt)
+                zf.writestr(f"{ESSAY_MEMBER_DIR}/{essay.essay_id}.ann", essay.ann)
+                labels.append((f"{essay.essay_id}.ann", essay.prompt, essay.stance))
+    else:
+        os.makedirs(path, exist_ok=True)
+        for essay in iter_synth_essays(cfg):
+            for ext, content in ((".txt", essay.txt), (".ann", essay.ann)):
+                with open(os.path.join(path, essay.essay_id + ext), "w", encoding="utf-8", newline="") as f:
+                    f.write(content)
+            labels.append((f"{essay.essay_id}.ann", essay.prompt, essay.stance))
+    return labels
+
+
+def config_args(parser: argparse.ArgumentParser) -> None:
+    """Add the ``SynthConfig`` knobs (except the essay count) to ``parser``."""
+    defaults = SynthConfig()
+    parser.add_argument("--claims", type=int, default=defaults.claims, help="claims per essay")
+    parser.add_argument("--depth", type=int, default=defaults.depth, help="premise levels under each claim")
+    parser.add_argument("--fanout", type=int, default=defaults.fanout, help="premises per parent")
+    parser.add_argument("--attack-rate", type=float, default=defaults.attack_rate)
+    parser.add_argument("--cycle-rate", type=float, default=defaults.cycle_rate)
+    parser.add_argument("--share-rate", type=float, default=defaults.share_rate)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def config_from(args: argparse.Namespace, n_essays: int) -> SynthConfig:
+    return SynthConfig(
+        n_essays, args.claims, args.depth, args.fanout, args.attack_rate, args.cycle_rate, args.share_rate, args.seed
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic BRAT corpus")
+    parser.add_argument("--essays", type=int, default=1000)
+    parser.add_argument("--out", required=True, help="output .zip, or a directory for plain .txt/.ann files")
+    config_args(parser)
+    args = parser.parse_args(argv)
+    labels = write_corpus(args.out, config_from(args, args.essays))
+    print(f"Wrote {len(labels)} synthetic essays to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""Streaming loader for the conversations-gone-awry CMV corpus (ConvoKit layout).
+
+``conversations.json`` and ``speakers.json`` are single JSON objects keyed by
+id. ``iter_json_object`` walks such an object one ``(key, value)`` item at a
+time, reading fixed-size chunks and decoding each value with
+``JSONDecoder.raw_decode``, so only the current record is ever held as a
+Python object.
+
+``utterances.jsonl`` (ConvoKit's one-record-per-line file) is streamed
+line by line; it is not checked in, so ``iter_utterances`` raises
+``FileNotFoundError`` until it is downloaded next to the other files.
+
+``PairIndex`` keeps what the derailment-vs-control analysis needs from every
+conversation: the conversation ids plus typed arrays for the paired row,
+``has_removed_comment`` and the split.
+"""
+
+import argparse
+import array
+import json
+import os
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+
+from analysis.paths import data_path
+
+
+CMV_DIR = data_path("conversations-gone-awry-cmv-corpus-large")
+
+CHUNK_SIZE = 1 << 16
+_WHITESPACE = " \t\n\r"
+
+
+def _skip_ws(buf: str, pos: int) -> int:
+    while pos < len(buf) and buf[pos] in _WHITESPACE:
+        pos += 1
+    return pos
+
+
+def iter_json_object(f: TextIO, chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[str, Any]]:
+    """Yield the ``(key, value)`` items of the top-level JSON object in ``f``."""
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+
+    def fill() -> bool:
+        nonlocal buf, pos, eof
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buf = buf[pos:] + chunk
+        pos = 0
+        return True
+
+    def token() -> str:
+        # Next non-whitespace character, reading more input as needed
+        nonlocal pos
+        while True:
+            pos = _skip_ws(buf, pos)
+            if pos < len(buf):
+                return buf[pos]
+            if not fill():
+                raise ValueError("unexpected end of JSON input")
+
+    def value() -> Any:
+        nonlocal pos
+        token()
+        while True:
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if fill():
+                    continue
+                raise
+            # A value not yet followed by a delimiter (e.g. "-1.5" of "-1.5e3")
+            # may continue in the next chunk
+            after = _skip_ws(buf, end)
+            if (after == len(buf) or buf[after] not in ",:}]") and not eof and fill():
+                continue
+            pos = end
+            return obj
+
+    if token() != "{":
+        raise ValueError("expected a JSON object")
+    pos += 1
+    if token() == "}":
+        return
+    while True:
+        key = value()
+        if not isinstance(key, str) or token() != ":":
+            raise ValueError(f"malformed object member near {key!r}")
+        pos += 1
+        yield key, value()
+        sep = token()
+        pos += 1
+        if sep == "}":
+            return
+        if sep != ",":
+            raise ValueError(f"expected ',' or '}}' after {key!r}")
+
+
+def iter_records(name: str, corpus_dir: str = CMV_DIR) -> Iterator[Tuple[str, Dict]]:
+    """Stream ``<name>.json`` (``conversations`` or ``speakers``) as ``(id, record)``."""
+    with open(os.path.join(corpus_dir, f"{name}.json"), encoding="utf-8") as f:
+        yield from iter_json_object(f)
+
+
+def iter_conversations(corpus_dir: str = CMV_DIR) -> Iterator[Tuple[str, Dict]]:
+    return iter_records("conversations", corpus_dir)
+
+
+def iter_speakers(corpus_dir: str = CMV_DIR) -> Iterator[Tuple[str, Dict]]:
+    return iter_records("speakers", corpus_dir)
+
+
+class Utterance(NamedTuple):
+    id: str
+    conversation_id: str
+    reply_to: Optional[str]
+    speaker: str
+
+
+def iter_utterances(corpus_dir: str = CMV_DIR) -> Iterator[Utterance]:
+    """Stream ``utterances.jsonl`` (one JSON record per line), keeping only the tree fields."""
+    path = os.path.join(corpus_dir, "utterances.jsonl")
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} is missing; it is not checked in (download the corpus with ConvoKit)")
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            rec = json.loads(line)
+            yield Utterance(
+                rec["id"],
+                rec.get("conversation_id") or rec.get("root") or "",
+                rec.get("reply_to"),
+                rec.get("speaker") or rec.get("user") or "",
+            )
+
+
+class PairIndex:
+    """Conversation rows with their ``pair`` row (-1 if unpaired), removal flag and split code."""
+
+    def __init__(self, ids: List[str], pair: array.array, removed: array.array, split: array.array, splits: List[str]):
+        self.ids = ids
+        self.pair = pair
+        self.removed = removed
+        self.split = split
+        self.splits = splits
+        self._row_of: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def build(cls, conversations: Optional[Iterator[Tuple[str, Dict]]] = None) -> "PairIndex":
+        if conversations is None:
+            conversations = iter_conversations()
+        ids: List[str] = []
+        pair_ids: List[str] = []
+        removed, split = array.array("b"), array.array("b")
+        split_code: Dict[str, int] = {}
+        for conv_id, record in conversations:
+            meta = record.get("meta") or {}
+            ids.append(conv_id)
+            pair_ids.append(meta.get("pair_id") or "")
+            removed.append(1 if meta.get("has_removed_comment") else 0)
+            split.append(split_code.setdefault(meta.get("split") or "", len(split_code)))
+        row_of = {conv_id: i for i, conv_id in enumerate(ids)}
+        pair = array.array("i", (row_of.get(p, -1) for p in pair_ids))
+        index = cls(ids, pair, removed, split, list(split_code))
+        index._row_of = row_of
+        return index
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def row_of(self, conv_id: str) -> int:
+        if self._row_of is None:
+            self._row_of = {c: i for i, c in enumerate(self.ids)}
+        return self._row_of[conv_id]
+
+    def pairs(self, split: Optional[str] = None) -> Iterator[Tuple[int, int]]:
+        """``(derailed_row, control_row)`` for every pair whose halves disagree on removal."""
+        code = self.splits.index(split) if split in self.splits else None
+        if split is not None and code is None:
+            return
+        for row, other in enumerate(self.pair):
+            if other < 0 or not self.removed[row] or self.removed[other]:
+                continue
+            if code is None or self.split[row] == code:
+                yield row, other
+
+    def split_counts(self) -> Dict[str, int]:
+        counts = [0] * len(self.splits)
+        for code in self.split:
+            counts[code] += 1
+        return dict(zip(self.splits, counts))
+
+
+def main(argv: Optional[List[str]] = None):
+    argparse.ArgumentParser(description="Conversation and pair counts of the CMV awry corpus").parse_args(argv)
+    index = PairIndex.build()
+    n_speakers = sum(1 for _ in iter_speakers())
+    n_unpaired = sum(1 for p in index.pair if p < 0)
+    print(f"Conversations: {len(index)} ({sum(index.removed)} with a removed comment), speakers: {n_speakers}")
+    for name, count in index.split_counts().items():
+        print(f"  {name or '(none)'}: {count} conversations, {sum(1 for _ in index.pairs(name))} derailed/control pairs")
+    print(f"Unpaired conversations: {n_unpaired}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Structural metrics over the reply trees of the CMV awry conversations.
+
+A reply tree has the same shape as an AAEC support graph: every reply is an
+incoming edge of the utterance it answers, just as a premise is an incoming
+support edge of its claim. So each conversation is packed into an
+``ArgumentGraph`` and measured with ``graph_metrics``, the same linear-time
+walk ``aaec_analyze`` uses:
+
+* ``max_depth``: longest reply chain, counted in utterances.
+* ``avg_breadth`` / ``max_breadth``: direct replies per utterance that got
+  any replies.
+
+The utterances are read in one streaming pass and bucketed per conversation
+with a counting sort, so every tree is built and walked in O(V + E). Every
+derailed conversation is then compared with its calm pair. The per-
+conversation metrics and the per-pair deltas (derailed - control) are written
+to one column file (``analysis/columnar.py``).
+"""
+
+import argparse
+import array
+import math
+import os
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from analysis.aaec.graph import SUPPORT, ArgumentGraph, graph_metrics  # noqa: E402
+from analysis.cmv.corpus import CMV_DIR, PairIndex, Utterance, iter_conversations, iter_utterances  # noqa: E402
+from analysis.columnar import pack_strings, write_columns  # noqa: E402
+from analysis.paths import output_path  # noqa: E402
+
+
+OUTPUT_PATH = output_path("cmv_reply_tree_metrics.col")
+
+# Bump when a metric definition or the column layout changes.
+METRICS_VERSION = 1
+
+# metric -> column typecode
+METRICS = {
+    "n_utterances": "i",
+    "n_speakers": "i",
+    "max_depth": "i",
+    "max_breadth": "i",
+    "avg_breadth": "d",
+}
+
+
+class ReplyForest:
+    """Every utterance, bucketed by conversation row.
+
+    Conversation ``c`` owns utterance rows ``order[offsets[c] : offsets[c + 1]]``;
+    ``parent`` and ``speaker`` are indexed by utterance row (``parent`` is -1
+    for roots and for replies to utterances outside the corpus).
+    """
+
+    def __init__(self, utterances: Iterable[Utterance], index: PairIndex):
+        row_of: Dict[str, int] = {}
+        conv = array.array("i")
+        reply_to: List[Optional[str]] = []
+        speaker = array.array("i")
+        speaker_code: Dict[str, int] = {}
+        for utt in utterances:
+            try:
+                c = index.row_of(utt.conversation_id)
+            except KeyError:
+                continue
+            row_of[utt.id] = len(conv)
+            conv.append(c)
+            reply_to.append(utt.reply_to)
+            speaker.append(speaker_code.setdefault(utt.speaker, len(speaker_code)))
+        self.parent = array.array("i", (row_of.get(r, -1) if r else -1 for r in reply_to))
+        self.speaker = speaker
+
+        # Counting sort of utterance rows by conversation
+        offsets = array.array("q", [0]) * (len(index) + 1)
+        for c in conv:
+            offsets[c + 1] += 1
+        for c in range(len(index)):
+            offsets[c + 1] += offsets[c]
+        fill = array.array("q", offsets[:-1])
+        order = array.array("i", [0]) * len(conv)
+        for u, c in enumerate(conv):
+            order[fill[c]] = u
+            fill[c] += 1
+        self.order = order
+        self.offsets = offsets
+
+    def tree(self, c: int) -> Tuple[int, array.array, array.array, array.array]:
+        """``(n, src, dst, speakers)`` of conversation ``c`` in local node ids (reply -> parent)."""
+        members = self.order[self.offsets[c] : self.offsets[c + 1]]
+        local = {u: i for i, u in enumerate(members)}
+        src, dst = array.array("i"), array.array("i")
+        for i, u in enumerate(members):
+            p = local.get(self.parent[u], -1)
+            if p >= 0:
+                src.append(i)
+                dst.append(p)
+        return len(members), src, dst, array.array("i", (self.speaker[u] for u in members))
+
+
+def tree_metrics(n: int, src: array.array, dst: array.array, speakers: Iterable[int]) -> Dict:
+    """AAEC-style depth and breadth for one reply tree (``src`` replies to ``dst``)."""
+    graph = ArgumentGraph(n, src, dst, array.array("b", [SUPPORT]) * len(src))
+    has_parent = bytearray(n)
+    for s in src:
+        has_parent[s] = 1
+    roots = [v for v in range(n) if not has_parent[v]]
+    answered = [v for v in range(n) if graph.breadth(v)]
+    g = graph_metrics(graph, roots, answered, depth_kinds=[SUPPORT], breadth_kinds=[SUPPORT])
+    return {
+        "n_utterances": n,
+        "n_speakers": len(set(speakers)),
+        "max_depth": g["max_depth"],
+        "max_breadth": max(g["breadths"], default=0),
+        "avg_breadth": math.fsum(g["breadths"]) / len(g["breadths"]) if g["breadths"] else 0.0,
+    }
+
+
+def analyze_reply_trees(corpus_dir: str = CMV_DIR) -> Tuple[PairIndex, Dict[str, array.array]]:
+    """Per-conversation metric columns, in ``PairIndex`` row order."""
+    index = PairIndex.build(iter_conversations(corpus_dir))
+    forest = ReplyForest(iter_utterances(corpus_dir), index)
+    columns = {name: array.array(code) for name, code in METRICS.items()}
+    for c in range(len(index)):
+        for name, value in tree_metrics(*forest.tree(c)).items():
+            columns[name].append(value)
+    return index, columns
+
+
+def pair_deltas(index: PairIndex, columns: Dict[str, array.array]) -> Dict[str, array.array]:
+    """``pair_derailed``/``pair_control`` rows plus ``delta_<metric>`` (derailed - control) per pair."""
+    out = {"pair_derailed": array.array("i"), "pair_control": array.array("i")}
+    out.update({f"delta_{name}": array.array("d") for name in METRICS})
+    for derailed, control in index.pairs():
+        out["pair_derailed"].append(derailed)
+        out["pair_control"].append(control)
+        for name, col in columns.items():
+            out[f"delta_{name}"].append(col[derailed] - col[control])
+    return out
+
+
+def write_metrics(path: str, index: PairIndex, columns: Dict[str, array.array], deltas: Dict[str, array.array]) -> None:
+    blob, offsets = pack_strings(index.ids)
+    out = {
+        "conversations.blob": blob,
+        "conversations.offsets": offsets,
+        "pair": index.pair,
+        "removed": index.removed,
+        "split": index.split,
+    }
+    out.update(columns)
+    out.update(deltas)
+    write_columns(path, out, {"version": METRICS_VERSION, "splits": index.splits, "metrics": list(METRICS)})
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Reply-tree structural metrics for the CMV awry corpus")
+    parser.add_argument("--corpus-dir", default=CMV_DIR, help="ConvoKit corpus directory (needs utterances.jsonl)")
+    parser.add_argument("--out", default=OUTPUT_PATH, help="column file to write")
+    args = parser.parse_args(argv)
+
+    index, columns = analyze_reply_trees(args.corpus_dir)
+    deltas = pair_deltas(index, columns)
+    write_metrics(args.out, index, columns, deltas)
+    n_pairs = len(deltas["pair_derailed"])
+    print(f"Wrote reply-tree metrics for {len(index)} conversations and {n_pairs} pairs to {args.out}")
+    for name in METRICS:
+        col = deltas[f"delta_{name}"]
+        mean = math.fsum(col) / n_pairs if n_pairs else 0.0
+        higher = sum(1 for d in col if d > 0)
+        print(f"  {name}: mean derailed - control {mean:+.3f} (derailed higher in {higher}/{n_pairs} pairs)")
+
+
+if __name__ == "__main__":
+    main()
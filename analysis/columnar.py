@@ -0,0 +1,160 @@
+"""Minimal binary columnar file format shared by the analysis scripts.
+
+A file is a small JSON header followed by raw, 8-byte aligned column blocks.
+Columns are ``array.array`` buffers with fixed-size typecodes, so a reader can
+``mmap`` the file and hand out zero-copy ``memoryview`` casts per column.
+
+Layout::
+
+    MAGIC (8 bytes) | header length (uint64 LE) | JSON header | padding | blocks
+"""
+
+import array
+import json
+import mmap
+import os
+import struct
+import sys
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+MAGIC = b"ANLPCOL1"
+ALIGN = 8
+# array typecodes whose item size is the same on every platform we run on
+TYPECODES = {"b", "B", "h", "H", "i", "I", "q", "Q", "f", "d"}
+
+
+def _pad(n: int) -> int:
+    return (-n) % ALIGN
+
+
+def pack_strings(values: Iterable[str]) -> Tuple[array.array, array.array]:
+    """Encode strings as a UTF-8 blob plus an int64 offsets array (len n+1)."""
+    blob = bytearray()
+    offsets = array.array("q", [0])
+    for v in values:
+        blob += v.encode("utf-8")
+        offsets.append(len(blob))
+    return array.array("B", bytes(blob)), offsets
+
+
+def write_columns(path: str, columns: Dict[str, array.array], meta: Optional[Dict] = None) -> None:
+    """Write ``columns`` to ``path`` atomically (temp file + rename)."""
+    specs: Dict[str, Dict] = {}
+    cursor = 0
+    for name, col in columns.items():
+        if col.typecode not in TYPECODES:
+            raise ValueError(f"column {name!r} has unsupported typecode {col.typecode!r}")
+        nbytes = len(col) * col.itemsize
+        specs[name] = {"typecode": col.typecode, "offset": cursor, "length": len(col)}
+        cursor += nbytes + _pad(nbytes)
+
+    header = json.dumps(
+        {"byteorder": sys.byteorder, "meta": meta or {}, "columns": specs},
+        separators=(",", ":"),
+    ).encode("utf-8")
+    data_start = len(MAGIC) + 8 + len(header)
+    data_start += _pad(data_start)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        f.write(b"\0" * (data_start - f.tell()))
+        for name, col in columns.items():
+            raw = col.tobytes()
+            f.write(raw)
+            f.write(b"\0" * _pad(len(raw)))
+    os.replace(tmp_path, path)
+
+
+def read_header(path: str) -> Dict:
+    """Read just the JSON header of a column file (no mapping)."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a column file")
+        (n,) = struct.unpack("<Q", f.read(8))
+        return json.loads(f.read(n).decode("utf-8"))
+
+
+class StringColumn(Sequence):
+    """Lazy view over a ``pack_strings`` blob/offsets pair."""
+
+    def __init__(self, blob: memoryview, offsets: memoryview):
+        self._blob = blob
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return max(0, len(self._offsets) - 1)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return str(self.view(i), "utf-8")
+
+    def view(self, i: int) -> memoryview:
+        """Raw UTF-8 bytes of item ``i`` as a zero-copy slice of the blob."""
+        return self._blob[self._offsets[i] : self._offsets[i + 1]]
+
+
+class ColumnFile:
+    """Read-only, memory-mapped column file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        header = read_header(path)
+        if header.get("byteorder") != sys.byteorder:
+            raise ValueError(f"{path} was written on a {header.get('byteorder')}-endian host")
+        self.meta: Dict = header.get("meta", {})
+        self._specs: Dict[str, Dict] = header["columns"]
+        with open(path, "rb") as f:
+            f.seek(len(MAGIC))
+            (n,) = struct.unpack("<Q", f.read(8))
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        data_start = len(MAGIC) + 8 + n
+        self._data_start = data_start + _pad(data_start)
+        self._views: Dict[str, memoryview] = {}
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._specs)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._specs
+
+    def column(self, name: str) -> memoryview:
+        view = self._views.get(name)
+        if view is None:
+            spec = self._specs[name]
+            itemsize = array.array(spec["typecode"]).itemsize
+            start = self._data_start + spec["offset"]
+            stop = start + spec["length"] * itemsize
+            # Release the whole-file view at once; only the column view stays exported
+            with memoryview(self._mm) as whole:
+                view = whole[start:stop].cast(spec["typecode"])
+            self._views[name] = view
+        return view
+
+    def strings(self, name: str) -> StringColumn:
+        return StringColumn(self.column(f"{name}.blob"), self.column(f"{name}.offsets"))
+
+    def close(self) -> None:
+        for view in self._views.values():
+            view.release()
+        self._views.clear()
+        if self._mm is not None:
+            # BufferError here means a caller still holds a slice of a column
+            self._mm.close()
+            self._mm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,48 @@
+"""Ordered, chunked process-pool mapping for per-essay analysis.
+
+Results are yielded in input order regardless of which worker finishes first,
+so anything built from them (JSON outputs in particular) is byte-identical to
+a serial run.
+"""
+
+import os
+from typing import Callable, Iterable, Iterator, Optional, Sequence
+
+
+def resolve_workers(workers: Optional[int]) -> int:
+    """``None``/``1`` -> serial, ``0`` or negative -> one per CPU."""
+    if workers is None:
+        return 1
+    if workers <= 0:
+        return os.cpu_count() or 1
+    return workers
+
+
+def ordered_map(
+    func: Callable,
+    items: Iterable,
+    workers: Optional[int] = 1,
+    chunksize: Optional[int] = None,
+    initializer: Optional[Callable] = None,
+    initargs: Sequence = (),
+) -> Iterator:
+    """Yield ``func(item)`` for every item, in order, using up to ``workers`` processes.
+
+    ``initializer(*initargs)`` runs once per worker (or once in-process for the
+    serial path) and is the place to open shared read-only state such as the
+    memory-mapped corpus. ``func`` must be a module-level function.
+    """
+    items = list(items)
+    workers = min(resolve_workers(workers), max(1, len(items)))
+    if workers == 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for item in items:
+            yield func(item)
+        return
+    # Imported here so serial runs (and --help) never load multiprocessing
+    import multiprocessing
+
+    chunksize = chunksize or max(1, len(items) // (workers * 4))
+    with multiprocessing.Pool(workers, initializer, tuple(initargs)) as pool:
+        yield from pool.imap(func, items, chunksize)
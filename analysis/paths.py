@@ -0,0 +1,25 @@
+"""Dataset and output locations shared by every script.
+
+By default datasets are read from ``dataset/`` and results are written to
+``analysis_outputs/`` under the repository root. The ``ANLP_DATA_DIR`` and
+``ANLP_OUTPUT_DIR`` environment variables override these locations.
+``python -m analysis --data-dir/--output-dir`` sets both variables before it
+imports a subcommand, so every module's path constants follow them.
+"""
+
+import os
+
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_DIR = os.path.abspath(os.environ.get("ANLP_DATA_DIR") or os.path.join(REPO_ROOT, "dataset"))
+OUTPUT_DIR = os.path.abspath(os.environ.get("ANLP_OUTPUT_DIR") or os.path.join(REPO_ROOT, "analysis_outputs"))
+CACHE_DIR = os.path.join(OUTPUT_DIR, "cache")
+FIGURES_DIR = os.path.join(REPO_ROOT, "reports/figures")
+
+
+def data_path(*parts: str) -> str:
+    return os.path.join(DATA_DIR, *parts)
+
+
+def output_path(*parts: str) -> str:
+    return os.path.join(OUTPUT_DIR, *parts)
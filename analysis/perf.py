@@ -0,0 +1,127 @@
+"""Per-stage timing, memory and counter instrumentation.
+
+Scripts mark their phases with ``with perf.stage("parse"):`` and tally events
+with ``perf.count("ann_lines_skipped")``. Each stage records wall time, CPU
+time, the process's peak RSS at exit and, while ``tracemalloc`` is tracing,
+the traced-allocation peak inside the stage. Nested stages are keyed by path
+(``load/parse``) and repeated entries accumulate.
+
+Everything goes to one process-wide recorder, so instrumenting a function
+costs nothing more than the context manager. ``run_all`` resets the recorder
+before each pipeline stage, saves a snapshot per stage and merges the
+snapshots into ``analysis_outputs/perf_report.json``. Events counted in pool
+worker processes are not merged back.
+"""
+
+import contextlib
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, Iterator, List, Optional
+
+from analysis.paths import CACHE_DIR, output_path
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+PERF_REPORT_PATH = output_path("perf_report.json")
+FRAGMENT_DIR = os.path.join(CACHE_DIR, "perf")
+
+
+def peak_rss_kb(children: bool = False) -> int:
+    """High-water resident set size of this process (or its reaped children), in KiB."""
+    if resource is None:
+        return 0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # ru_maxrss is in bytes on macOS and KiB elsewhere
+    return usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+
+
+def children_cpu_s() -> float:
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class Recorder:
+    def __init__(self):
+        self.sections: Dict[str, Dict] = {}
+        self.counters: Counter = Counter()
+        self._path: List[str] = []
+        # Traced peak seen so far by each open stage, before an inner stage reset it
+        self._peaks: List[int] = []
+
+    def reset(self) -> None:
+        self.__init__()
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        self._path.append(name)
+        self._peaks.append(0)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            key = "/".join(self._path)
+            self._path.pop()
+            traced = max(self._peaks.pop(), tracemalloc.get_traced_memory()[1]) if tracing else None
+            if tracing and self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], traced)
+            rec = self.sections.setdefault(key, {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0})
+            rec["calls"] += 1
+            rec["wall_s"] += wall
+            rec["cpu_s"] += cpu
+            rec["peak_rss_kb"] = peak_rss_kb()
+            if traced is not None:
+                rec["tracemalloc_peak_kb"] = max(rec.get("tracemalloc_peak_kb", 0), traced // 1024)
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] += n
+
+    def snapshot(self) -> Dict:
+        return {
+            "sections": {k: dict(v) for k, v in self.sections.items()},
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+
+_recorder = Recorder()
+stage = _recorder.stage
+count = _recorder.count
+snapshot = _recorder.snapshot
+reset = _recorder.reset
+
+
+def fragment_path(name: str, fragment_dir: str = FRAGMENT_DIR) -> str:
+    return os.path.join(fragment_dir, f"{name}.json")
+
+
+def save_fragment(name: str, record: Dict, fragment_dir: str = FRAGMENT_DIR) -> None:
+    """Persist one pipeline stage's record (written from whichever process ran it)."""
+    os.makedirs(fragment_dir, exist_ok=True)
+    path = fragment_path(name, fragment_dir)
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=2)
+    os.replace(tmp, path)
+
+
+def load_json(path: str) -> Optional[Dict]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
@@ -1,53 +1,198 @@
+"""Figures for the AAEC pro/con stance comparison.
+
+Every figure is described by a small spec (kind, data, style) and drawn with
+matplotlib's object-oriented API (``Figure`` + Agg canvas, no pyplot state
+machine), so specs can be rendered independently in a process pool.
+matplotlib is imported only when a figure is actually drawn.
+
+A sidecar manifest (``reports/figures/manifest.json``) records the hash of
+each figure's spec. A figure whose spec hash is unchanged and whose PNG
+exists is not redrawn.
+
+Per-topic differences are drawn as small multiples: one panel per topic in
+``per_topic_diffs``, ``PANELS_PER_PAGE`` panels to a figure. Each page is a
+single figure and a single ``savefig``, so the per-figure overhead does not
+grow with the number of topics.
+"""
+
+import argparse
+import hashlib
 import json
+import math
 import os
+import sys
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional
 
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
-AAEC_COMP_PATH = os.path.abspath(
-    os.path.join(
-        os.path.dirname(__file__),
-        "../../analysis_outputs/aaec_stance_comparison.json",
-    )
+from analysis import perf  # noqa: E402
+from analysis.aaec.aaec_compare_stance import (  # noqa: E402
+    METRIC_KEYS, STANCE_PATH, compare_stances, load_metrics, load_stances,
 )
+from analysis.parallel import ordered_map  # noqa: E402
+from analysis.paths import FIGURES_DIR, output_path  # noqa: E402
 
 
-def plot_grouped_bar(pro_mean, con_mean, metric_name, out_dir):
-    labels = ['pro', 'con']
-    values = [pro_mean, con_mean]
-    colors = ['#4C78A8', '#F58518']
-    plt.figure(figsize=(4, 3))
-    plt.bar(labels, values, color=colors)
-    plt.title(metric_name.replace('_', ' '))
-    plt.ylabel(metric_name)
-    plt.tight_layout()
-    out_path = os.path.join(out_dir, f"aaec_{metric_name}.png")
-    plt.savefig(out_path, dpi=150)
-    plt.close()
-    return out_path
+AAEC_COMP_PATH = output_path("aaec_stance_comparison.json")
+MANIFEST_NAME = "manifest.json"
 
+BAR_METRICS = ["attack_ratio", "evidence_density", "avg_breadth"]
+PANELS_PER_PAGE = 24
+PANEL_COLUMNS = 6
+TITLE_CHARS = 30
 
-def main():
-    with open(AAEC_COMP_PATH, encoding='utf-8') as f:
-        comp = json.load(f)
-    overall = comp.get('overall', {})
-    out_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../reports/figures"))
-    os.makedirs(out_dir, exist_ok=True)
+# Part of every figure's hash: changing the style redraws the figures
+STYLE = {
+    "version": 1,
+    "dpi": 150,
+    "bar_figsize": [4, 3],
+    "panel_size": [2.4, 1.8],
+    "colors": {"pro": "#4C78A8", "con": "#F58518"},
+}
+
+
+class FigureSpec(NamedTuple):
+    name: str  # PNG file name under the figures directory
+    kind: str  # "bar" or "topics"
+    data: Dict
+    style: Dict
+
+    def digest(self) -> str:
+        payload = json.dumps([self.kind, self.data, self.style], sort_keys=True, separators=(",", ":"))
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
 
-    paths = []
-    for metric in ["attack_ratio", "evidence_density", "avg_breadth"]:
+
+def figure_specs(comp: Dict) -> List[FigureSpec]:
+    overall = comp.get('overall', {})
+    specs = []
+    for metric in BAR_METRICS:
         o = overall.get(metric, {})
-        pro_mean = o.get('pro_mean', 0.0)
-        con_mean = o.get('con_mean', 0.0)
-        paths.append(plot_grouped_bar(pro_mean, con_mean, metric, out_dir))
+        data = {"metric": metric, "pro": o.get('pro_mean', 0.0), "con": o.get('con_mean', 0.0)}
+        specs.append(FigureSpec(f"aaec_{metric}.png", "bar", data, STYLE))
+    topics = sorted(comp.get('per_topic_diffs', {}).items())
+    n_pages = math.ceil(len(topics) / PANELS_PER_PAGE)
+    for page in range(n_pages):
+        chunk = topics[page * PANELS_PER_PAGE : (page + 1) * PANELS_PER_PAGE]
+        data = {"metrics": METRIC_KEYS, "topics": [[t, [d.get(m, 0.0) for m in METRIC_KEYS]] for t, d in chunk]}
+        suffix = f"_p{page + 1}" if n_pages > 1 else ""
+        specs.append(FigureSpec(f"aaec_per_topic_diffs{suffix}.png", "topics", data, STYLE))
+    return specs
 
-    print("Saved plots:\n" + "\n".join(paths))
 
+def draw_bar(fig: "Figure", data: Dict, style: Dict) -> None:
+    metric = data["metric"]
+    ax = fig.add_subplot()
+    ax.bar(['pro', 'con'], [data["pro"], data["con"]], color=[style["colors"]["pro"], style["colors"]["con"]])
+    ax.set_title(metric.replace('_', ' '))
+    ax.set_ylabel(metric)
+
+
+def draw_topics(fig: "Figure", data: Dict, style: Dict) -> None:
+    """One panel per topic: pro - con difference of every metric."""
+    topics = data["topics"]
+    cols = min(PANEL_COLUMNS, len(topics))
+    rows = math.ceil(len(topics) / cols)
+    axes = fig.subplots(rows, cols, squeeze=False)
+    labels = [m.replace('_', ' ') for m in data["metrics"]]
+    positions = list(range(len(labels)))
+    for ax, (topic, diffs) in zip(axes.flat, topics):
+        colors = [style["colors"]["pro"] if d >= 0 else style["colors"]["con"] for d in diffs]
+        ax.barh(positions, diffs, color=colors)
+        ax.axvline(0, color="#888888", linewidth=0.5)
+        ax.set_yticks(positions)
+        ax.set_yticklabels(labels, fontsize=6)
+        ax.tick_params(axis="x", labelsize=6)
+        ax.set_title(topic if len(topic) <= TITLE_CHARS else topic[: TITLE_CHARS - 3] + "...", fontsize=7)
+    for ax in list(axes.flat)[len(topics):]:
+        ax.set_visible(False)
+
+
+def _figure_size(spec: FigureSpec) -> List[float]:
+    if spec.kind == "bar":
+        return spec.style["bar_figsize"]
+    n = len(spec.data["topics"])
+    cols = min(PANEL_COLUMNS, n)
+    width, height = spec.style["panel_size"]
+    return [width * cols, height * math.ceil(n / cols)]
 
-if __name__ == "__main__":
-    main()
 
+def render(spec: FigureSpec, out_dir: str) -> str:
+    # matplotlib costs ~0.4 s to import; only pay it when something is drawn
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
 
+    fig = Figure(figsize=_figure_size(spec))
+    FigureCanvasAgg(fig)
+    if spec.kind == "bar":
+        draw_bar(fig, spec.data, spec.style)
+        fig.tight_layout()
+    else:
+        # Fixed margins: tight_layout measures every panel's text and dominates large pages
+        draw_topics(fig, spec.data, spec.style)
+        fig.subplots_adjust(left=0.07, right=0.98, bottom=0.06, top=0.94, wspace=0.9, hspace=0.6)
+    out_path = os.path.join(out_dir, spec.name)
+    fig.savefig(out_path, dpi=spec.style["dpi"])
+    return out_path
+
+
+def _render_job(job) -> str:
+    spec, out_dir = job
+    return render(spec, out_dir)
+
+
+def load_manifest(out_dir: str) -> Dict[str, str]:
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(out_dir: str, manifest: Dict[str, str]) -> None:
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    tmp = path + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def load_comparison():
+    """Stance comparison from aaec_compare_stance's output, recomputed if it is missing"""
+    if os.path.exists(AAEC_COMP_PATH):
+        with open(AAEC_COMP_PATH, encoding='utf-8') as f:
+            return json.load(f)
+    return compare_stances(load_metrics(), load_stances(STANCE_PATH))
 
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Plot the AAEC pro/con stance comparison")
+    parser.add_argument("--workers", type=int, default=1, help="rendering processes (0 = one per CPU)")
+    parser.add_argument("--force", action="store_true", help="redraw figures even if the manifest matches")
+    parser.add_argument("--out-dir", default=FIGURES_DIR)
+    args = parser.parse_args(argv)
+
+    with perf.stage("load"):
+        comp = load_comparison()
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    specs = figure_specs(comp)
+    manifest = {} if args.force else load_manifest(args.out_dir)
+    todo = [
+        s for s in specs
+        if manifest.get(s.name) != s.digest() or not os.path.exists(os.path.join(args.out_dir, s.name))
+    ]
+    perf.count("figures_rendered", len(todo))
+    perf.count("figures_cached", len(specs) - len(todo))
+    with perf.stage("plot"):
+        paths = list(ordered_map(_render_job, [(s, args.out_dir) for s in todo], args.workers))
+
+    # Drop entries of figures no longer produced (e.g. fewer topic pages)
+    save_manifest(args.out_dir, {s.name: s.digest() for s in specs})
+    print(f"Saved {len(paths)} plots ({len(specs) - len(todo)} unchanged)" + "".join(f"\n{p}" for p in paths))
+
+
+if __name__ == "__main__":
+    main()
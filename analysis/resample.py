@@ -0,0 +1,156 @@
+"""Paired permutation tests and bootstrap confidence intervals.
+
+Both work on one difference per pair (e.g. pro - con per topic) and are
+computed a block of resamples at a time rather than one Python loop per
+resample:
+
+* Sign-flip permutations draw every block's random signs as one big integer.
+  The differences are split into 8-wide chunks, and each chunk gets a table
+  of all (up to 256) of its subset sums. The flipped sum of a resample is then
+  ``total - 2 * sum(table_j[byte_j])``, evaluated for the whole block with
+  ``map`` over the bytes of that chunk. Pairs with ``2**n <= n_resamples``
+  are enumerated exactly instead.
+* Bootstrap resamples come from a single ``random.choices`` call per block,
+  and row sums come from ``map(math.fsum, ...)`` over the reshaped draws.
+
+Blocks have a fixed size and a seed derived from ``(seed, block)``, so the
+result for a given seed does not depend on how many worker processes ran the
+blocks.
+"""
+
+import math
+import operator
+import random
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from analysis.parallel import ordered_map
+
+
+BLOCK = 4096
+CHUNK_BITS = 8
+# |stat| >= |observed| with a little slack for float noise in the sums
+TOLERANCE = 1e-12
+
+
+def subset_sum_tables(values: Sequence[float]) -> List[List[float]]:
+    """For each 8-value chunk, the sum of every subset indexed by its bit mask."""
+    tables = []
+    for start in range(0, len(values), CHUNK_BITS):
+        chunk = values[start : start + CHUNK_BITS]
+        table = [0.0] * (1 << len(chunk))
+        for mask in range(1, len(table)):
+            low = mask & -mask
+            table[mask] = table[mask ^ low] + chunk[low.bit_length() - 1]
+        tables.append(table)
+    return tables
+
+
+def _blocks(values: Sequence[float], n_resamples: int, seed: Optional[int]) -> List[Tuple]:
+    """Work items ``(values, size, seed, block)`` covering ``n_resamples`` resamples."""
+    values = list(values)
+    n_blocks = (n_resamples + BLOCK - 1) // BLOCK
+    return [(values, min(BLOCK, n_resamples - b * BLOCK), seed, b) for b in range(n_blocks)]
+
+
+def _block_seed(seed: Optional[int], block: int, salt: int) -> Optional[int]:
+    return None if seed is None else (seed * 1_000_003 + block) * 4 + salt
+
+
+def _flip_block(args: Tuple[Sequence[float], int, Optional[int], int]) -> List[float]:
+    """Sign-flipped sums for ``size`` random resamples."""
+    diffs, size, seed, block = args
+    rng = random.Random(_block_seed(seed, block, 1))
+    n = len(diffs)
+    width = (n + CHUNK_BITS - 1) // CHUNK_BITS
+    # One draw for the whole block: resample r owns bytes [r*width, (r+1)*width)
+    masks = rng.getrandbits(size * width * 8).to_bytes(size * width, "little")
+    if n % CHUNK_BITS:
+        # Bits past n in the last chunk must not flip anything
+        keep = (1 << (n % CHUNK_BITS)) - 1
+        masks = bytearray(masks)
+        masks[width - 1 :: width] = bytes(b & keep for b in masks[width - 1 :: width])
+    tables = subset_sum_tables(diffs)
+    flipped = [0.0] * size
+    for j, table in enumerate(tables):
+        flipped = list(map(operator.add, flipped, map(table.__getitem__, masks[j::width])))
+    total = math.fsum(diffs)
+    return [total - 2.0 * s for s in flipped]
+
+
+def permutation_test(
+    diffs: Sequence[float], n_resamples: int = 10000, seed: Optional[int] = 0, workers: int = 1
+) -> Dict[str, float]:
+    """Two-sided paired sign-flip test of ``mean(diffs) == 0``.
+
+    Returns ``{statistic, p_value, n_resamples, exact}``; with ``2**n`` sign
+    patterns or fewer than ``n_resamples`` every pattern is enumerated.
+    """
+    n = len(diffs)
+    if n == 0:
+        return {"statistic": 0.0, "p_value": 1.0, "n_resamples": 0, "exact": True}
+    total = math.fsum(diffs)
+    observed = abs(total)
+    if 2 ** n <= n_resamples:
+        # Every subset of flipped signs: cross the per-chunk subset-sum tables
+        subset_sums = [0.0]
+        for table in subset_sum_tables(diffs):
+            subset_sums = [s + t for t in table for s in subset_sums]
+        hits = sum(1 for s in subset_sums if abs(total - 2.0 * s) >= observed - TOLERANCE)
+        return {
+            "statistic": total / n,
+            "p_value": hits / len(subset_sums),
+            "n_resamples": len(subset_sums),
+            "exact": True,
+        }
+    hits = 0
+    for sums in ordered_map(_flip_block, _blocks(diffs, n_resamples, seed), workers):
+        hits += sum(1 for s in sums if abs(s) >= observed - TOLERANCE)
+    # Add-one estimate: the observed labelling is itself one of the permutations
+    return {
+        "statistic": total / n,
+        "p_value": (hits + 1) / (n_resamples + 1),
+        "n_resamples": n_resamples,
+        "exact": False,
+    }
+
+
+def _bootstrap_block(args: Tuple[Sequence[float], int, Optional[int], int]) -> List[float]:
+    """Means of ``size`` bootstrap resamples of ``values``."""
+    values, size, seed, block = args
+    rng = random.Random(_block_seed(seed, block, 2))
+    n = len(values)
+    draws = rng.choices(values, k=size * n)
+    return list(map(operator.truediv, map(math.fsum, zip(*[iter(draws)] * n)), [n] * size))
+
+
+def quantile(sorted_values: Sequence[float], q: float) -> float:
+    """Linear-interpolation quantile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    pos = q * (len(sorted_values) - 1)
+    lo = math.floor(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def bootstrap_ci(
+    values: Sequence[float],
+    n_resamples: int = 10000,
+    confidence: float = 0.95,
+    seed: Optional[int] = 0,
+    workers: int = 1,
+) -> Dict[str, float]:
+    """Percentile bootstrap interval for the mean: ``{mean, ci_low, ci_high, confidence}``."""
+    if not values:
+        return {"mean": 0.0, "ci_low": 0.0, "ci_high": 0.0, "confidence": confidence}
+    means: List[float] = []
+    for block_means in ordered_map(_bootstrap_block, _blocks(values, n_resamples, seed), workers):
+        means.extend(block_means)
+    means.sort()
+    alpha = (1.0 - confidence) / 2
+    return {
+        "mean": math.fsum(values) / len(values),
+        "ci_low": quantile(means, alpha),
+        "ci_high": quantile(means, 1.0 - alpha),
+        "confidence": confidence,
+    }
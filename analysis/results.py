@@ -0,0 +1,135 @@
+"""Per-essay results as typed columns, with JSON Lines for text consumers.
+
+A results file is a column file (``analysis/columnar.py``). It holds the
+record ids as a packed string column and one ``array`` per field, and each
+field has a fixed typecode (``"i"`` for counts, ``"d"`` for ratios). A
+reader maps the file and pulls out only the columns it asks for, so there
+are no per-record dicts and no JSON parsing::
+
+    with ResultsFile(path) as results:
+        depth = results.column("max_depth")
+        matrix = results.matrix(["attack_ratio", "avg_breadth"])
+
+``write_jsonl`` streams the same records one JSON object per line for tools
+that need text. ``python -m analysis.results FILE`` converts an existing
+results file to JSON Lines on stdout.
+"""
+
+import argparse
+import array
+import json
+import os
+import sys
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence
+
+from analysis.columnar import ColumnFile, StringColumn, pack_strings, write_columns
+from analysis.stats import FeatureMatrix
+
+
+RESULTS_VERSION = 1
+
+
+def write_results(
+    path: str,
+    records: Iterable[Mapping],
+    fields: Mapping[str, str],
+    id_key: str = "essay_id",
+    meta: Optional[Dict] = None,
+) -> int:
+    """Write ``records`` as one column per field; ``fields`` maps name -> typecode. Returns the row count."""
+    ids: List[str] = []
+    columns = {name: array.array(code) for name, code in fields.items()}
+    for rec in records:
+        ids.append(rec[id_key])
+        for name, col in columns.items():
+            col.append(float(rec[name]) if col.typecode == "d" else int(rec[name]))
+    blob, offsets = pack_strings(ids)
+    out = {f"{id_key}.blob": blob, f"{id_key}.offsets": offsets}
+    out.update(columns)
+    header = {"version": RESULTS_VERSION, "id": id_key, "fields": list(fields)}
+    header.update(meta or {})
+    write_columns(path, out, header)
+    return len(ids)
+
+
+def write_jsonl(path: str, records: Iterable[Mapping]) -> int:
+    """Stream ``records`` to ``path`` as JSON Lines (atomically); returns the row count."""
+    tmp = f"{path}.tmp{os.getpid()}"
+    n = 0
+    with open(tmp, "w", encoding="utf-8") as f:
+        for rec in records:
+            f.write(json.dumps(rec, separators=(",", ":")))
+            f.write("\n")
+            n += 1
+    os.replace(tmp, path)
+    return n
+
+
+class ResultsFile:
+    """Read-only view of a ``write_results`` file."""
+
+    def __init__(self, path: str):
+        self._file = ColumnFile(path)
+        meta = self._file.meta
+        if meta.get("version") != RESULTS_VERSION or "fields" not in meta:
+            self._file.close()
+            raise ValueError(f"{path} is not a version {RESULTS_VERSION} results file")
+        self.path = path
+        self.meta = meta
+        self.id_key: str = meta["id"]
+        self.fields: List[str] = meta["fields"]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def ids(self) -> StringColumn:
+        return self._file.strings(self.id_key)
+
+    def column(self, field: str) -> memoryview:
+        """Zero-copy view of one field; valid until the file is closed."""
+        if field not in self.fields:
+            raise KeyError(field)
+        return self._file.column(field)
+
+    def matrix(self, features: Sequence[str]) -> FeatureMatrix:
+        """``FeatureMatrix`` of just ``features``, reading no other column."""
+        k = len(features)
+        data = array.array("d", [0.0]) * (len(self) * k)
+        for j, name in enumerate(features):
+            data[j::k] = array.array("d", self.column(name))
+        return FeatureMatrix(list(self.ids), features, data)
+
+    def records(self, fields: Optional[Sequence[str]] = None) -> Iterator[Dict]:
+        """One dict per row (id plus ``fields``, default all), built as it is consumed."""
+        names = list(fields or self.fields)
+        columns = [self.column(name) for name in names]
+        for i, id_ in enumerate(self.ids):
+            rec = {name: col[i] for name, col in zip(names, columns)}
+            rec[self.id_key] = id_
+            yield rec
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Print a results file as JSON Lines")
+    parser.add_argument("path", help="results column file")
+    parser.add_argument("--fields", help="comma-separated fields to include (default: all)")
+    args = parser.parse_args(argv)
+
+    fields = [f for f in args.fields.split(",") if f] if args.fields else None
+    with ResultsFile(args.path) as results:
+        for rec in results.records(fields):
+            sys.stdout.write(json.dumps(rec, separators=(",", ":")) + "\n")
+
+
+if __name__ == "__main__":
+    main()
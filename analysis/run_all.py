@@ -1,24 +1,361 @@
+"""Run the analysis pipeline in-process, in dependency order.
+
+Each ``Stage`` declares the files it reads and writes; a stage depends on
+every stage that writes one of its inputs. Its source inputs are found by
+following the imports of its module through the repository. Stages run by importing their
+module and calling ``main`` (no interpreter start-up per script), and stages
+whose dependencies are done run side by side in forked processes, so the
+AAEC and ArgKP branches proceed in parallel.
+
+A stage is skipped when it is fresh: all outputs exist and either every
+input is older than the oldest output, or the inputs' content hashes match
+the ones recorded after its last successful run.
+
+Every stage that runs is timed through ``analysis.perf``, together with the
+sections and counters the script records itself. The results are merged into
+``analysis_outputs/perf_report.json`` (fresh stages keep their last
+measurement), and stages that got markedly slower than in the previous report
+are flagged.
+"""
+
+import argparse
+import ast
+import hashlib
+import importlib
+import importlib.util
+import json
+import multiprocessing
+import multiprocessing.connection
 import os
-import subprocess
+import sys
+import time
+import traceback
+import tracemalloc
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-def run_script(path: str):
-    print(f"Running {path}...")
-    result = subprocess.run(["python3", path], capture_output=True, text=True)
-    print(result.stdout)
-    if result.returncode != 0:
-        print(result.stderr)
-        raise SystemExit(result.returncode)
 
+from analysis import perf  # noqa: E402
+from analysis.paths import CACHE_DIR, FIGURES_DIR, REPO_ROOT, data_path, output_path  # noqa: E402
 
-def main():
-    base = os.path.dirname(__file__)
-    run_script(os.path.join(base, "aaec", "aaec_analyze.py"))
-    run_script(os.path.join(base, "argkp", "argkp_analyze.py"))
 
+STAMPS_PATH = os.path.join(CACHE_DIR, "run_all_stamps.json")
 
-if __name__ == "__main__":
-    main()
+# A stage regressed if it took this much longer than in the previous report
+REGRESSION_FACTOR = 1.5
+REGRESSION_MIN_S = 0.5
+
+
+def _p(*parts: str) -> str:
+    return os.path.join(REPO_ROOT, *parts)
+
+
+AAEC_ZIP = data_path("ArgumentAnnotatedEssays-2.0/brat-project-final.zip")
+ARGKP_ZIP = data_path("IBM_Debater_(R)_ArgKP-2021.zip")
+METRICS_JSON = output_path("aaec_structural_metrics.json")
+METRICS_COL = output_path("aaec_structural_metrics.col")
+STANCE_CSV = _p("analysis/aaec/stance_labels.csv")
+STANCE_COMPARISON_JSON = output_path("aaec_stance_comparison.json")
+# generate_plots rewrites its manifest on every run; which figures it lists
+# depends on the number of topics, so the manifest stands in for all of them
+FIGURES_MANIFEST = os.path.join(FIGURES_DIR, "manifest.json")
+
+
+class Stage(NamedTuple):
+    name: str
+    module: str
+    inputs: Tuple[str, ...]  # data and source files; a change to any makes the stage stale
+    outputs: Tuple[str, ...]
+    args: Tuple[str, ...] = ()  # passed as main(argv)
+    requires: Tuple[str, ...] = ()  # optional third-party modules; skipped if missing
+
+
+def module_path(name: str) -> Optional[str]:
+    """Source file of a module that lives in this repository, else ``None``."""
+    base = os.path.join(REPO_ROOT, *name.split("."))
+    for path in (base + ".py", os.path.join(base, "__init__.py")):
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def module_sources(module: str) -> Tuple[str, ...]:
+    """Source files of ``module`` and every repository module it imports, transitively.
+
+    Imports are read from the syntax tree (including ones inside functions), so
+    nothing is imported and optional dependencies need not be installed.
+    """
+    seen: List[str] = []
+    todo = [module]
+    while todo:
+        path = module_path(todo.pop())
+        if path is None or path in seen:
+            continue
+        seen.append(path)
+        with open(path, encoding="utf-8") as f:
+            tree = ast.parse(f.read(), path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                todo.extend(a.name for a in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                todo.append(node.module)
+                # "from analysis import perf" names a module, not an attribute
+                todo.extend(f"{node.module}.{a.name}" for a in node.names)
+    return tuple(sorted(seen))
+
+
+def _stage(name: str, module: str, data: Tuple[str, ...], outputs: Tuple[str, ...], **kwargs) -> Stage:
+    """A ``Stage`` whose inputs are ``data`` plus every source file ``module`` imports."""
+    return Stage(name, module, data + module_sources(module), outputs, **kwargs)
+
+
+def pipeline(workers: int = 1) -> List[Stage]:
+    return [
+        _stage(
+            "aaec_analyze",
+            "analysis.aaec.aaec_analyze",
+            (AAEC_ZIP,),
+            (METRICS_JSON, METRICS_COL),
+            args=("--workers", str(workers)),
+        ),
+        _stage(
+            "aaec_compare_stance",
+            "analysis.aaec.aaec_compare_stance",
+            (METRICS_COL, STANCE_CSV),
+            (STANCE_COMPARISON_JSON,),
+            args=("--workers", str(workers)),
+        ),
+        _stage(
+            "argkp_analyze",
+            "analysis.argkp.argkp_analyze",
+            (ARGKP_ZIP,),
+            (output_path("argkp_summary.json"),),
+        ),
+        _stage(
+            "argkp_baseline",
+            "analysis.argkp.argkp_baseline",
+            (ARGKP_ZIP,),
+            (output_path("argkp_baseline.json"),),
+        ),
+        _stage(
+            "generate_plots",
+            "analysis.plots.generate_plots",
+            # The metrics and labels feed its fallback when the comparison is missing
+            (STANCE_COMPARISON_JSON, METRICS_COL, STANCE_CSV),
+            (FIGURES_MANIFEST,),
+            args=("--workers", str(workers)),
+            requires=("matplotlib",),
+        ),
+    ]
+
+
+def dependencies(stages: Sequence[Stage]) -> Dict[str, List[str]]:
+    """Stage name -> names of the stages producing its inputs."""
+    producer = {out: s.name for s in stages for out in s.outputs}
+    return {s.name: sorted({producer[i] for i in s.inputs if i in producer} - {s.name}) for s in stages}
+
+
+def file_hash(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
 
 
+def input_hashes(stage: Stage) -> Dict[str, str]:
+    return {os.path.relpath(p, REPO_ROOT): file_hash(p) for p in stage.inputs if os.path.exists(p)}
 
+
+def is_fresh(stage: Stage, stamps: Dict[str, Dict[str, str]]) -> bool:
+    if not all(os.path.exists(p) for p in stage.outputs):
+        return False
+    oldest_output = min(os.path.getmtime(p) for p in stage.outputs)
+    if all(os.path.exists(p) and os.path.getmtime(p) <= oldest_output for p in stage.inputs):
+        return True
+    # Touched but unchanged inputs (e.g. after a checkout) still count as fresh
+    return stamps.get(stage.name) == input_hashes(stage)
+
+
+def load_stamps(path: str = STAMPS_PATH) -> Dict[str, Dict[str, str]]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_stamps(stamps: Dict[str, Dict[str, str]], path: str = STAMPS_PATH) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(stamps, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def run_stage(stage: Stage, trace_memory: bool = False) -> None:
+    """Import and run one stage, saving its perf record (also when it fails)."""
+    print(f"Running {stage.name}...", flush=True)
+    perf.reset()
+    if trace_memory:
+        tracemalloc.start()
+    children_cpu = perf.children_cpu_s()
+    status = "failed"
+    try:
+        with perf.stage(stage.name):
+            module = importlib.import_module(stage.module)
+            module.main(list(stage.args))
+        status = "ran"
+    finally:
+        record = perf.snapshot()
+        total = record["sections"].get(stage.name, {})
+        record.update(
+            status=status,
+            wall_s=total.get("wall_s", 0.0),
+            cpu_s=total.get("cpu_s", 0.0),
+            children_cpu_s=perf.children_cpu_s() - children_cpu,
+            peak_rss_kb=perf.peak_rss_kb(),
+        )
+        if trace_memory:
+            record["tracemalloc_peak_kb"] = total.get("tracemalloc_peak_kb", 0)
+            tracemalloc.stop()
+        perf.save_fragment(stage.name, record)
+        sys.stdout.flush()
+
+
+def _stage_process(stage: Stage, trace_memory: bool) -> None:
+    try:
+        run_stage(stage, trace_memory)
+    except SystemExit as e:
+        raise SystemExit(e.code if isinstance(e.code, int) else 1)
+
+
+def run_pipeline(
+    stages: Sequence[Stage], jobs: int = 2, force: bool = False, trace_memory: bool = False
+) -> Dict[str, str]:
+    """Run ``stages`` in dependency order; returns stage name -> ran/fresh/skipped/failed."""
+    deps = dependencies(stages)
+    by_name = {s.name: s for s in stages}
+    stamps = load_stamps()
+    status: Dict[str, str] = {}
+    running: Dict[int, Tuple[str, multiprocessing.Process]] = {}
+
+    def finish(name: str, ok: bool) -> None:
+        status[name] = "ran" if ok else "failed"
+        if ok:
+            stamps[name] = input_hashes(by_name[name])
+            save_stamps(stamps)
+
+    while len(status) < len(stages):
+        progressed = False
+        for stage in stages:
+            name = stage.name
+            if name in status or any(name == n for n, _ in running.values()):
+                continue
+            if any(status.get(d) is None for d in deps[name]):
+                continue
+            if any(status[d] in ("failed", "skipped") for d in deps[name]):
+                status[name] = "skipped"
+                print(f"Skipping {name}: a dependency did not complete")
+            elif any(importlib.util.find_spec(m) is None for m in stage.requires):
+                status[name] = "skipped"
+                print(f"Skipping {name}: requires {', '.join(stage.requires)}")
+            elif not force and all(status[d] == "fresh" for d in deps[name]) and is_fresh(stage, stamps):
+                status[name] = "fresh"
+                print(f"{name} is up to date")
+            elif jobs <= 1:
+                _clear_fragment(name)
+                try:
+                    run_stage(stage, trace_memory)
+                except (Exception, SystemExit) as e:
+                    # Same outcome as a failed forked stage: report, mark dependents skipped, carry on
+                    if not isinstance(e, SystemExit):
+                        traceback.print_exc()
+                    finish(name, False)
+                    print(f"{name} failed ({type(e).__name__}: {e})")
+                else:
+                    finish(name, True)
+            elif len(running) < jobs:
+                _clear_fragment(name)
+                proc = multiprocessing.Process(target=_stage_process, args=(stage, trace_memory), name=name)
+                proc.start()
+                running[proc.sentinel] = (name, proc)
+            else:
+                continue
+            progressed = True
+        if running and not progressed:
+            for sentinel in multiprocessing.connection.wait(list(running)):
+                name, proc = running.pop(sentinel)
+                proc.join()
+                finish(name, proc.exitcode == 0)
+                if proc.exitcode != 0:
+                    print(f"{name} failed (exit code {proc.exitcode})")
+    return status
+
+
+def _clear_fragment(name: str) -> None:
+    try:
+        os.remove(perf.fragment_path(name))
+    except OSError:
+        pass
+
+
+def write_perf_report(
+    stages: Sequence[Stage], status: Dict[str, str], wall_s: float, path: str = perf.PERF_REPORT_PATH
+) -> Dict:
+    """Merge this run's stage records with the previous report and flag slowdowns."""
+    previous = (perf.load_json(path) or {}).get("stages", {})
+    report: Dict = {"python": sys.version.split()[0], "wall_s": wall_s, "stages": {}, "regressions": []}
+    for stage in stages:
+        name = stage.name
+        measured = status.get(name) in ("ran", "failed")
+        record = perf.load_json(perf.fragment_path(name)) if measured else None
+        if record is None:
+            # Not run this time: keep the last measurement, marked as carried over
+            last = previous.get(name, {})
+            record = dict(last, reused=True) if "wall_s" in last else {}
+            record["status"] = status.get(name, "skipped")
+            report["stages"][name] = record
+            continue
+        last = previous.get(name, {})
+        # Only compare like with like: tracemalloc slows a stage down several times
+        comparable = ("tracemalloc_peak_kb" in last) == ("tracemalloc_peak_kb" in record)
+        if last.get("status") == "ran" and record["status"] == "ran" and comparable:
+            record["previous_wall_s"] = last["wall_s"]
+            if record["wall_s"] > max(last["wall_s"] * REGRESSION_FACTOR, last["wall_s"] + REGRESSION_MIN_S):
+                report["regressions"].append(name)
+        report["stages"][name] = record
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp, path)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the analysis scripts")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes for per-essay stages (0 = one per CPU)")
+    parser.add_argument("--jobs", type=int, default=2, help="stages to run at once (1 = serial, in this process)")
+    parser.add_argument("--force", action="store_true", help="rerun every stage even if its outputs are fresh")
+    parser.add_argument("--trace-memory", action="store_true", help="record tracemalloc peaks (slower)")
+    args = parser.parse_args(argv)
+
+    stages = pipeline(args.workers)
+    start = time.perf_counter()
+    status = run_pipeline(stages, jobs=args.jobs, force=args.force, trace_memory=args.trace_memory)
+    report = write_perf_report(stages, status, time.perf_counter() - start)
+    for name, rec in report["stages"].items():
+        if status.get(name) in ("ran", "failed"):
+            print(f"  {name}: {rec['wall_s']:.2f}s wall, {rec['cpu_s']:.2f}s CPU, peak RSS {rec['peak_rss_kb'] // 1024} MiB")
+    for name in report["regressions"]:
+        rec = report["stages"][name]
+        print(f"Warning: {name} took {rec['wall_s']:.2f}s, up from {rec['previous_wall_s']:.2f}s")
+    print(f"Perf report written to {perf.PERF_REPORT_PATH}")
+    if "failed" in status.values():
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
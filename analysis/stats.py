@@ -0,0 +1,190 @@
+"""Cross-essay statistics over a single essays x features matrix.
+
+``FeatureMatrix`` holds every feature of every essay in one row-major
+``array('d')``. A feature column is one strided slice of that buffer, and
+means, extrema, variances and Cohen's d are computed per column with C-level
+builtins (``math.fsum``, ``min``, ``max``, ``map`` over ``operator``
+functions) instead of rebuilding a Python list per feature and per group.
+
+``GroupIndex`` is a precomputed group-by over integer row ids: the rows of
+every group stored contiguously in one array, with an offsets array marking
+where each group starts. Grouped aggregates then gather the rows once and
+reduce each group as a slice.
+Used by ``experiment2_auto_analysis``, ``aaec_compare_stance`` and the plots.
+"""
+
+import array
+import math
+import operator
+from itertools import repeat
+from typing import Dict, Hashable, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+
+class GroupIndex:
+    """Integer row ids grouped by key: group ``g`` is ``rows[offsets[g] : offsets[g + 1]]``.
+
+    Groups keep the order their keys were first seen in, and rows keep their
+    input order within a group.
+    """
+
+    def __init__(self, keys: Sequence[Hashable], rows: array.array, offsets: array.array):
+        if len(offsets) != len(keys) + 1 or offsets[-1] != len(rows):
+            raise ValueError("offsets must have one entry per group plus the end of rows")
+        self.keys = list(keys)
+        self.rows = rows
+        self.offsets = offsets
+        self._group_of = {k: g for g, k in enumerate(self.keys)}
+
+    @classmethod
+    def build(cls, pairs: Iterable[Tuple[Hashable, int]]) -> "GroupIndex":
+        """Index ``(key, row)`` pairs."""
+        members: Dict[Hashable, List[int]] = {}
+        for key, row in pairs:
+            members.setdefault(key, []).append(row)
+        rows, offsets = array.array("i"), array.array("q", [0])
+        for group in members.values():
+            rows.extend(group)
+            offsets.append(len(rows))
+        return cls(list(members), rows, offsets)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._group_of
+
+    def group(self, key: Hashable) -> int:
+        return self._group_of[key]
+
+    def members(self, key: Hashable) -> array.array:
+        g = self._group_of[key]
+        return self.rows[self.offsets[g] : self.offsets[g + 1]]
+
+    def sizes(self) -> List[int]:
+        return list(map(operator.sub, self.offsets[1:], self.offsets[:-1]))
+
+    def subset(self, keys: Iterable[Hashable]) -> "GroupIndex":
+        """The groups of ``keys`` only, in that order."""
+        return GroupIndex.build((k, r) for k in keys for r in self.members(k))
+
+
+class FeatureMatrix:
+    """``n_rows x len(features)`` float matrix with one id per row."""
+
+    def __init__(self, ids: Sequence[Hashable], features: Sequence[str], data: array.array):
+        if len(data) != len(ids) * len(features):
+            raise ValueError(f"expected {len(ids)} x {len(features)} values, got {len(data)}")
+        self.ids = list(ids)
+        self.features = list(features)
+        self.data = data
+        self._row_of: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def from_records(
+        cls, records: Iterable[Mapping], features: Sequence[str], id_key: Optional[str] = "essay_id"
+    ) -> "FeatureMatrix":
+        """One row per record; ``id_key`` names the id field (``None`` numbers the rows)."""
+        ids: List[str] = []
+        data = array.array("d")
+        for i, rec in enumerate(records):
+            ids.append(rec[id_key] if id_key is not None else str(i))
+            data.extend(float(rec[f]) for f in features)
+        return cls(ids, features, data)
+
+    @classmethod
+    def from_rows(cls, ids: Sequence[str], features: Sequence[str], rows: Iterable[Sequence[float]]) -> "FeatureMatrix":
+        data = array.array("d")
+        for row in rows:
+            data.extend(row)
+        return cls(ids, features, data)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def row_of(self, id_: str) -> int:
+        if self._row_of is None:
+            self._row_of = {i: r for r, i in enumerate(self.ids)}
+        return self._row_of[id_]
+
+    def rows_of(self, ids: Iterable[str]) -> List[int]:
+        """Row indices of ``ids`` that are present (unknown ids are skipped)."""
+        if self._row_of is None:
+            self._row_of = {i: r for r, i in enumerate(self.ids)}
+        return [self._row_of[i] for i in ids if i in self._row_of]
+
+    def column(self, feature: str) -> array.array:
+        k = len(self.features)
+        return self.data[self.features.index(feature) :: k]
+
+    def columns(self) -> List[array.array]:
+        k = len(self.features)
+        return [self.data[j::k] for j in range(k)]
+
+    def take(self, rows: Sequence[int]) -> "FeatureMatrix":
+        """Sub-matrix of the given rows, in that order."""
+        k = len(self.features)
+        data = array.array("d")
+        for r in rows:
+            data.extend(self.data[r * k : (r + 1) * k])
+        return FeatureMatrix([self.ids[r] for r in rows], self.features, data)
+
+    def means(self) -> List[float]:
+        """Per-feature mean (0.0 for an empty matrix)."""
+        n = len(self.ids)
+        return [math.fsum(col) / n if n else 0.0 for col in self.columns()]
+
+    def describe(self) -> Dict[str, Dict[str, float]]:
+        """``{feature: {n, mean, min, max, std}}`` with the population standard deviation."""
+        n = len(self.ids)
+        out: Dict[str, Dict[str, float]] = {}
+        for name, col in zip(self.features, self.columns()):
+            if not n:
+                out[name] = {"n": 0, "mean": 0.0, "min": 0.0, "max": 0.0, "std": 0.0}
+                continue
+            mean = math.fsum(col) / n
+            out[name] = {"n": n, "mean": mean, "min": min(col), "max": max(col), "std": math.sqrt(_pvar(col, mean))}
+        return out
+
+    def group_means(self, index: GroupIndex, features: Optional[Sequence[str]] = None) -> "FeatureMatrix":
+        """One row per group of ``index``: the mean of each of ``features`` (default: all).
+
+        The grouped rows are gathered into one contiguous buffer in a single
+        pass, then every group of every column is reduced as a slice.
+        """
+        features = list(self.features if features is None else features)
+        gathered = self.take(index.rows)
+        bounds = list(zip(index.offsets[:-1], index.offsets[1:]))
+        k = len(self.features)
+        cols = [gathered.data[self.features.index(f) :: k] for f in features]
+        data = array.array("d", [0.0]) * (len(bounds) * len(features))
+        for j, col in enumerate(cols):
+            data[j :: len(features)] = array.array(
+                "d", (math.fsum(col[lo:hi]) / (hi - lo) if hi > lo else 0.0 for lo, hi in bounds)
+            )
+        return FeatureMatrix(index.keys, features, data)
+
+
+def _pvar(col: Sequence[float], mean: float) -> float:
+    dev = list(map(operator.sub, col, repeat(mean)))
+    return math.fsum(map(operator.mul, dev, dev)) / len(dev)
+
+
+def cohen_d(x: Sequence[float], y: Sequence[float]) -> float:
+    """Mean difference over the pooled std, each group weighted by ``n - 1``."""
+    if not len(x) or not len(y):
+        return 0.0
+    mean_x = math.fsum(x) / len(x)
+    mean_y = math.fsum(y) / len(y)
+    var_x = _pvar(x, mean_x) if len(x) > 1 else 0.0
+    var_y = _pvar(y, mean_y) if len(y) > 1 else 0.0
+    n_x, n_y = len(x), len(y)
+    pooled = ((n_x - 1) * var_x + (n_y - 1) * var_y) / max(1, (n_x + n_y - 2))
+    sd = pooled ** 0.5
+    if sd == 0:
+        return 0.0
+    return (mean_x - mean_y) / sd
+
+
+def cohen_d_all(a: FeatureMatrix, b: FeatureMatrix) -> Dict[str, float]:
+    """Cohen's d of ``a`` vs ``b`` for every shared feature."""
+    return {f: cohen_d(ca, cb) for f, ca, cb in zip(a.features, a.columns(), b.columns())}
@@ -0,0 +1,147 @@
+"""Shared tokenization with interned token IDs for the IBM Debater scripts.
+
+``tokenize`` keeps the exact rules of the original ArgKP baseline (maximal
+alphanumeric runs, lower-cased, stopwords dropped) but scans with one regex
+instead of rebuilding the string character by character.
+
+``Tokenizer`` interns tokens into integer IDs and memoizes the ID tuple of
+each distinct text in a bounded LRU cache. It can also be backed by a
+precomputed token store: a column file holding the sorted texts of the ArgKP
+and arg-quality datasets with their token-ID arrays, so every script reuses
+one tokenization instead of redoing it. Build the store with::
+
+    python analysis/tokens.py
+"""
+
+import argparse
+import array
+import functools
+import os
+import re
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from analysis.columnar import ColumnFile, pack_strings, write_columns  # noqa: E402
+from analysis.paths import CACHE_DIR  # noqa: E402
+
+
+TOKEN_STORE_PATH = os.path.join(CACHE_DIR, "ibm_tokens.col")
+
+# Bump when tokenize's rules change so persisted stores are ignored.
+TOKENIZER_VERSION = 1
+
+STOPWORDS = set(
+    "a an the and or for of on in at to with by is are was were be being been it this that these those from as not no".split()
+)
+
+# [^\W_] is exactly str.isalnum() (verified over every code point)
+WORD_RE = re.compile(r"[^\W_]+")
+
+
+def tokenize(s: str) -> List[str]:
+    out = []
+    for t in WORD_RE.findall(s):
+        # Per-character lowering matches the original rules (no final-sigma context)
+        t = t.lower() if t.isascii() else "".join(c.lower() for c in t)
+        if t not in STOPWORDS:
+            out.append(t)
+    return out
+
+
+class Tokenizer:
+    def __init__(self, maxsize: int = 65536):
+        self.vocab: Dict[str, int] = {}
+        self.id_to_token: List[str] = []
+        self._store: Optional[ColumnFile] = None
+        self._store_index: Optional[Dict[str, int]] = None
+        self.ids = functools.lru_cache(maxsize=maxsize)(self._ids)
+
+    def intern(self, token: str) -> int:
+        tid = self.vocab.get(token)
+        if tid is None:
+            tid = self.vocab[token] = len(self.id_to_token)
+            self.id_to_token.append(token)
+        return tid
+
+    def _ids(self, text: str) -> Tuple[int, ...]:
+        if self._store is not None:
+            if self._store_index is None:
+                # One decode pass over the stored texts, then O(1) lookups
+                self._store_index = {t: j for j, t in enumerate(self._store.strings("texts"))}
+            j = self._store_index.get(text)
+            if j is not None:
+                offsets = self._store.column("offsets")
+                return tuple(self._store.column("ids")[offsets[j] : offsets[j + 1]])
+        return tuple(self.intern(t) for t in tokenize(text))
+
+    def tokens(self, text: str) -> List[str]:
+        """Same result as ``tokenize(text)``, served from the ID cache."""
+        return [self.id_to_token[i] for i in self.ids(text)]
+
+    def save(self, path: str, texts: Iterable[str]) -> int:
+        """Persist the token IDs of every distinct text in ``texts``; returns the count."""
+        unique = sorted(set(texts))
+        ids, offsets = array.array("i"), array.array("q", [0])
+        for text in unique:
+            ids.extend(self.ids(text))
+            offsets.append(len(ids))
+        text_blob, text_offsets = pack_strings(unique)
+        vocab_blob, vocab_offsets = pack_strings(self.id_to_token)
+        columns = {
+            "texts.blob": text_blob,
+            "texts.offsets": text_offsets,
+            "vocab.blob": vocab_blob,
+            "vocab.offsets": vocab_offsets,
+            "ids": ids,
+            "offsets": offsets,
+        }
+        write_columns(path, columns, {"version": TOKENIZER_VERSION})
+        return len(unique)
+
+    @classmethod
+    def load(cls, path: str = TOKEN_STORE_PATH, maxsize: int = 65536) -> "Tokenizer":
+        """Tokenizer backed by a saved store (plain tokenizer if missing or stale)."""
+        tok = cls(maxsize)
+        if not os.path.exists(path):
+            return tok
+        store = ColumnFile(path)
+        if store.meta.get("version") != TOKENIZER_VERSION:
+            store.close()
+            return tok
+        for token in store.strings("vocab"):
+            tok.intern(token)
+        tok._store = store
+        return tok
+
+
+_default: Optional[Tokenizer] = None
+
+
+def get_tokenizer() -> Tokenizer:
+    """Process-wide tokenizer, backed by the token store when it has been built."""
+    global _default
+    if _default is None:
+        _default = Tokenizer.load()
+    return _default
+
+
+def iter_dataset_texts() -> Iterable[str]:
+    from analysis.argkp.reader import iter_argkp
+    from analysis.argquality.reader import iter_arguments
+
+    for row in iter_argkp():
+        yield row.argument
+        yield row.key_point
+    yield from iter_arguments()
+
+
+def main(argv: Optional[List[str]] = None):
+    argparse.ArgumentParser(description="Precompute token IDs for the IBM dataset texts").parse_args(argv)
+    n = Tokenizer().save(TOKEN_STORE_PATH, iter_dataset_texts())
+    print(f"Wrote token IDs for {n} distinct texts to {TOKEN_STORE_PATH}")
+
+
+if __name__ == "__main__":
+    main()
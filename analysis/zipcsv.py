@@ -0,0 +1,58 @@
+"""Stream CSV rows straight out of a zip member (or a plain file).
+
+The IBM Debater datasets ship as zips; nothing needs to be extracted. Rows are
+decompressed and parsed incrementally, so memory stays flat regardless of the
+file size.
+"""
+
+import contextlib
+import csv
+import io
+import os
+import zipfile
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+
+def resolve_source(zip_path: str, member: str, extracted_path: Optional[str] = None) -> Tuple[str, Optional[str]]:
+    """Prefer an already-extracted CSV, otherwise read ``member`` from ``zip_path``."""
+    if extracted_path and os.path.exists(extracted_path):
+        return extracted_path, None
+    return zip_path, member
+
+
+@contextlib.contextmanager
+def open_text(path: str, member: Optional[str] = None, encoding: str = "utf-8"):
+    """Open a plain file, or ``member`` inside the zip at ``path``, as a text stream."""
+    if member is None:
+        with open(path, newline="", encoding=encoding) as f:
+            yield f
+        return
+    with zipfile.ZipFile(path) as zf, zf.open(member) as raw:
+        yield io.TextIOWrapper(raw, encoding=encoding, newline="")
+
+
+def iter_rows(
+    path: str, member: Optional[str] = None, fields: Optional[Sequence[str]] = None, encoding: str = "utf-8"
+) -> Iterator[List[str]]:
+    """Yield data rows as lists; with ``fields`` only those columns, in that order."""
+    with open_text(path, member, encoding) as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        if fields is None:
+            yield from reader
+            return
+        missing = [c for c in fields if c not in header]
+        if missing:
+            raise KeyError(f"{path}{'::' + member if member else ''} has no column(s) {missing}")
+        idx = [header.index(c) for c in fields]
+        for row in reader:
+            if len(row) < len(header):
+                row = row + [""] * (len(header) - len(row))
+            yield [row[i] for i in idx]
+
+
+def read_header(path: str, member: Optional[str] = None, encoding: str = "utf-8") -> List[str]:
+    with open_text(path, member, encoding) as f:
+        return next(csv.reader(f), [])
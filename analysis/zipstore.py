@@ -0,0 +1,142 @@
+"""Memory-mapped, offset-indexed access to the members of a zip archive.
+
+The central directory is read once into a member-offset index. Members that
+are stored uncompressed are served straight out of an ``mmap`` of the
+archive. Compressed members are inflated once into a cached column file
+(``analysis/columnar.py``) next to the other caches, which is then mapped
+too. Either way ``view(name)`` is a zero-copy ``memoryview`` and nothing is
+extracted to disk member by member.
+"""
+
+import array
+import hashlib
+import mmap
+import os
+import struct
+import zipfile
+from typing import Dict, List, Optional
+
+from analysis.columnar import ColumnFile, pack_strings, read_header, write_columns
+from analysis.paths import CACHE_DIR
+
+
+
+# Bump when the index layout changes so stale indexes rebuild.
+INDEX_VERSION = 1
+
+IN_ARCHIVE, IN_CACHE = 0, 1
+
+_LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+_LOCAL_MAGIC = b"PK\x03\x04"
+
+
+def default_index_path(zip_path: str) -> str:
+    digest = hashlib.sha1(os.path.abspath(zip_path).encode("utf-8")).hexdigest()[:10]
+    stem = os.path.splitext(os.path.basename(zip_path))[0]
+    return os.path.join(CACHE_DIR, f"zip_{stem}_{digest}.col")
+
+
+def _fingerprint(zip_path: str) -> List[int]:
+    st = os.stat(zip_path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def build_index(zip_path: str, index_path: str) -> None:
+    """Write the member-offset index (plus inflated compressed members) for ``zip_path``."""
+    names: List[str] = []
+    where, start, size = array.array("b"), array.array("q"), array.array("q")
+    data = bytearray()
+    with zipfile.ZipFile(zip_path) as zf, open(zip_path, "rb") as raw:
+        for info in sorted(zf.infolist(), key=lambda i: i.filename):
+            if info.is_dir():
+                continue
+            names.append(info.filename)
+            if info.compress_type == zipfile.ZIP_STORED and not info.flag_bits & 0x1:
+                # Data starts after the local header, whose name/extra lengths
+                # may differ from the central directory's
+                raw.seek(info.header_offset)
+                fields = _LOCAL_HEADER.unpack(raw.read(_LOCAL_HEADER.size))
+                if fields[0] != _LOCAL_MAGIC:
+                    raise zipfile.BadZipFile(f"bad local header for {info.filename}")
+                where.append(IN_ARCHIVE)
+                start.append(info.header_offset + _LOCAL_HEADER.size + fields[-2] + fields[-1])
+            else:
+                where.append(IN_CACHE)
+                start.append(len(data))
+                data += zf.read(info)
+            size.append(info.file_size)
+    name_blob, name_offsets = pack_strings(names)
+    columns = {
+        "names.blob": name_blob,
+        "names.offsets": name_offsets,
+        "where": where,
+        "start": start,
+        "size": size,
+        "data": array.array("B", bytes(data)),
+    }
+    meta = {"version": INDEX_VERSION, "source": os.path.abspath(zip_path), "fingerprint": _fingerprint(zip_path)}
+    write_columns(index_path, columns, meta)
+
+
+class ZipStore:
+    """Read-only member access for one zip archive; use as a context manager."""
+
+    def __init__(self, zip_path: str, index_path: Optional[str] = None, rebuild: bool = False):
+        self.zip_path = os.path.abspath(zip_path)
+        index_path = index_path or default_index_path(self.zip_path)
+        meta: Dict = {}
+        if os.path.exists(index_path):
+            try:
+                meta = read_header(index_path).get("meta", {})
+            except (OSError, ValueError):
+                meta = {}
+        if rebuild or meta.get("version") != INDEX_VERSION or meta.get("fingerprint") != _fingerprint(self.zip_path):
+            build_index(self.zip_path, index_path)
+        self._cols = ColumnFile(index_path)
+        self.names = self._cols.strings("names")
+        self._where = self._cols.column("where")
+        self._start = self._cols.column("start")
+        self._size = self._cols.column("size")
+        self._position = {name: i for i, name in enumerate(self.names)}
+        self._archive: Optional[mmap.mmap] = None
+        self._archive_view: Optional[memoryview] = None
+
+    def __len__(self) -> int:
+        return len(self._position)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._position
+
+    def _backing(self, i: int) -> memoryview:
+        if self._where[i] == IN_CACHE:
+            return self._cols.column("data")
+        if self._archive_view is None:
+            with open(self.zip_path, "rb") as f:
+                self._archive = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._archive_view = memoryview(self._archive)
+        return self._archive_view
+
+    def view(self, name: str) -> memoryview:
+        """Raw bytes of member ``name`` without copying (KeyError if absent)."""
+        i = self._position[name]
+        start = self._start[i]
+        return self._backing(i)[start : start + self._size[i]]
+
+    def text(self, name: str, encoding: str = "utf-8", errors: str = "strict") -> str:
+        return str(self.view(name), encoding, errors)
+
+    def close(self) -> None:
+        if self._archive_view is not None:
+            self._archive_view.release()
+            self._archive_view = None
+        if self._archive is not None:
+            # BufferError here means a caller still holds a member view
+            self._archive.close()
+            self._archive = None
+        self._cols.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -8,10 +8,13 @@ Analyze essay dataset to find:
 
 import csv
 import re
-from collections import defaultdict, Counter
-import os
+from collections import Counter
 import json
 
+from analysis.aaec.corpus import AAEC_ZIP_PATH
+from analysis.stats import GroupIndex
+from analysis.zipstore import ZipStore
+
 # Read prompts
 essays = []
 with open('dataset/ArgumentAnnotatedEssays-2.0/prompts.csv', 'r', encoding='latin-1') as f:
@@ -23,14 +26,10 @@ print(f"Total essays: {len(essays)}")
 print(f"\nFirst essay:")
 print(essays[0])
 
-# Group by prompt to find topics with multiple essays
-prompt_to_essays = defaultdict(list)
-for essay in essays:
-    prompt = essay['PROMPT']
-    essay_id = essay['ESSAY']
-    prompt_to_essays[prompt].append(essay_id)
+# Group by prompt to find topics with multiple essays (rows index into essays)
+prompt_index = GroupIndex.build((essay['PROMPT'], i) for i, essay in enumerate(essays))
 
-prompt_counts = [(prompt, len(essay_ids)) for prompt, essay_ids in prompt_to_essays.items()]
+prompt_counts = list(zip(prompt_index.keys, prompt_index.sizes()))
 prompt_counts.sort(key=lambda x: x[1], reverse=True)
 
 print(f"\n{'='*80}")
@@ -50,7 +49,11 @@ print("ESSAY PAIRS FOR SAME TOPICS:")
 print(f"{'='*80}")
 
 # Focus on topics with exactly 2 essays (likely pro/con pairs)
-pairs = {prompt: essay_ids for prompt, essay_ids in prompt_to_essays.items() if len(essay_ids) == 2}
+pairs = {
+    prompt: [essays[i]['ESSAY'] for i in prompt_index.members(prompt)]
+    for prompt, count in zip(prompt_index.keys, prompt_index.sizes())
+    if count == 2
+}
 print(f"\nTopics with exactly 2 essays (potential pro/con pairs): {len(pairs)}")
 pair_list = []
 for topic, essay_ids in list(pairs.items())[:15]:
@@ -63,19 +66,20 @@ print(f"\n{'='*80}")
 print("ANALYZING ARGUMENT STRUCTURES:")
 print(f"{'='*80}")
 
-brat_dir = 'dataset/ArgumentAnnotatedEssays-2.0/brat-project-final'
+# Essays are read straight out of the BRAT zip through its member-offset index
+brat_zip = ZipStore(AAEC_ZIP_PATH)
+brat_dir = 'brat-project-final'
 structure_stats = []
 
 # Analyze a sample of essays
 sample_essays = [e['ESSAY'] for e in essays[:20]]
 
 for essay_id in sample_essays:
-    ann_file = os.path.join(brat_dir, f'{essay_id}.ann')
-    if not os.path.exists(ann_file):
+    ann_file = f'{brat_dir}/{essay_id}.ann'
+    if ann_file not in brat_zip:
         continue
 
-    with open(ann_file, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
+    lines = brat_zip.text(ann_file).splitlines()
 
     # Count components
     major_claims = sum(1 for l in lines if '\tMajorClaim' in l)
@@ -120,13 +124,13 @@ print("CHECKING ZOO TOPIC ESSAYS (047 vs 173):")
 print(f"{'='*80}")
 
 for essay_id in ['essay047.txt', 'essay173.txt']:
-    txt_file = os.path.join(brat_dir, essay_id)
-    if os.path.exists(txt_file):
-        with open(txt_file, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-            print(f"\n{essay_id}:")
-            print(f"Topic: {lines[0].strip()}")
-            print(f"First sentence: {lines[2].strip()[:100]}...")
+    txt_file = f'{brat_dir}/{essay_id}'
+    if txt_file in brat_zip:
+        lines = brat_zip.text(txt_file).splitlines()
+        print(f"\n{essay_id}:")
+        print(f"Topic: {lines[0].strip()}")
+        print(f"First sentence: {lines[2].strip()[:100]}...")
+brat_zip.close()
 
 # Save results
 output = {
@@ -6,117 +6,150 @@ Analyze IBM datasets to understand:
 3. What structural info (if any) is available
 """
 
-import csv
 from collections import Counter, defaultdict
 
+from analysis.argkp.reader import iter_argkp
+from analysis.argquality.reader import iter_arg_quality_batches
+
 print("="*80)
 print("ANALYZING IBM ARGKP-2021 DATASET")
 print("="*80)
 
-# Analyze ArgKP dataset
-argkp_data = []
-with open('dataset/IBM_Debater_(R)_ArgKP-2021/ArgKP-2021_dataset.csv', 'r', encoding='utf-8') as f:
-    reader = csv.DictReader(f)
-    for row in reader:
-        argkp_data.append(row)
-
-print(f"\nTotal argument-keypoint pairs: {len(argkp_data)}")
+# Analyze ArgKP dataset in one streaming pass straight from the zip
+argkp_total = 0
+first_row = None
+sample_rows = []
+topics = Counter()
+stances = Counter()
+labels = Counter()
+for row in iter_argkp():
+    argkp_total += 1
+    if first_row is None:
+        first_row = row
+    # Keep a few examples from the first topic seen
+    if row.topic == first_row.topic and len(sample_rows) < 3:
+        sample_rows.append(row)
+    topics[row.topic] += 1
+    stances[row.stance] += 1
+    labels[row.label] += 1
+
+print(f"\nTotal argument-keypoint pairs: {argkp_total}")
 print(f"\nFirst row:")
-for key, val in list(argkp_data[0].items()):
+for key, val in first_row._asdict().items():
     print(f"  {key}: {val}")
 
 # Count topics
-topics = Counter(row['topic'] for row in argkp_data)
 print(f"\n{len(topics)} unique topics:")
 for topic, count in topics.most_common():
     print(f"  {count:5d} pairs: {topic}")
 
 # Analyze stance distribution
-stances = Counter(row['stance'] for row in argkp_data)
 print(f"\nStance distribution:")
 for stance, count in stances.items():
-    label = "PRO" if stance == "1" else "CON"
+    label = "PRO" if stance == 1 else "CON"
     print(f"  {label}: {count}")
 
 # Analyze labels
-labels = Counter(row['label'] for row in argkp_data)
 print(f"\nLabel distribution (matching vs non-matching):")
 for label, count in labels.items():
-    label_name = "MATCHING" if label == "1" else "NON-MATCHING"
+    label_name = "MATCHING" if label == 1 else "NON-MATCHING"
     print(f"  {label_name}: {count}")
 
 # Sample a topic to show structure
-sample_topic = list(topics.keys())[0]
-sample_rows = [r for r in argkp_data if r['topic'] == sample_topic][:3]
+sample_topic = first_row.topic
 print(f"\nSample from topic '{sample_topic}':")
 for i, row in enumerate(sample_rows, 1):
     print(f"\n  Example {i}:")
-    print(f"    Argument: {row['argument'][:80]}...")
-    print(f"    Key Point: {row['key_point']}")
-    print(f"    Stance: {'PRO' if row['stance']=='1' else 'CON'}")
-    print(f"    Matching: {'YES' if row['label']=='1' else 'NO'}")
+    print(f"    Argument: {row.argument[:80]}...")
+    print(f"    Key Point: {row.key_point}")
+    print(f"    Stance: {'PRO' if row.stance == 1 else 'CON'}")
+    print(f"    Matching: {'YES' if row.label == 1 else 'NO'}")
 
 print("\n" + "="*80)
 print("ANALYZING IBM ARGUMENT QUALITY DATASET")
 print("="*80)
 
-# Analyze arg quality dataset
-quality_data = []
-with open('dataset/IBM_Debater_(R)_arg_quality_rank_30k/arg_quality_rank_30k.csv', 'r', encoding='utf-8') as f:
-    reader = csv.DictReader(f)
-    for row in reader:
-        quality_data.append(row)
-
-print(f"\nTotal arguments: {len(quality_data)}")
+# Analyze arg quality dataset in one pass over typed column batches from the zip;
+# only per-category counts are kept, never the rows
+quality_total = 0
+first_quality = None
+sample_q = []
+topic_code_counts = Counter()
+stance_counts = Counter()
+split_counts = Counter()
+quality_topics = []
+quality_splits = []
+for batch in iter_arg_quality_batches():
+    if first_quality is None:
+        first_quality = {
+            'argument': batch.argument[0],
+            'topic': batch.topics[batch.topic[0]],
+            'set': batch.splits[batch.split[0]],
+            'WA': batch.wa[0],
+            'MACE-P': batch.mace_p[0],
+            'stance_WA': batch.stance[0],
+            'stance_WA_conf': batch.stance_conf[0],
+        }
+    # Keep a few examples from the first topic seen (code 0)
+    i = 0
+    while len(sample_q) < 3 and 0 in batch.topic[i:]:
+        i = batch.topic.index(0, i)
+        sample_q.append((batch.argument[i], batch.stance[i], batch.wa[i], batch.splits[batch.split[i]]))
+        i += 1
+    quality_total += len(batch.argument)
+    topic_code_counts.update(batch.topic)
+    stance_counts.update(batch.stance)
+    split_counts.update(batch.split)
+    quality_topics, quality_splits = batch.topics, batch.splits
+
+print(f"\nTotal arguments: {quality_total}")
 print(f"\nFirst row:")
-for key, val in list(quality_data[0].items()):
-    val_str = val[:60] if len(val) > 60 else val
+for key, val in (first_quality or {}).items():
+    val_str = str(val)
+    val_str = val_str[:60] if len(val_str) > 60 else val_str
     print(f"  {key}: {val_str}")
 
 # Count topics
-quality_topics = Counter(row['topic'] for row in quality_data)
 print(f"\n{len(quality_topics)} unique topics:")
-for topic, count in quality_topics.most_common(15):
-    print(f"  {count:5d} args: {topic}")
+for code, count in topic_code_counts.most_common(15):
+    print(f"  {count:5d} args: {quality_topics[code]}")
 
 # Analyze stance distribution
-quality_stances = Counter(row['stance_WA'] for row in quality_data)
 print(f"\nStance distribution:")
-for stance, count in quality_stances.items():
-    if stance == '1':
+for stance, count in stance_counts.items():
+    if stance == 1:
         label = "PRO"
-    elif stance == '-1':
+    elif stance == -1:
         label = "CON"
     else:
         label = "NEUTRAL/OTHER"
     print(f"  {label}: {count}")
 
 # Analyze data splits
-splits = Counter(row['set'] for row in quality_data)
 print(f"\nData splits:")
-for split, count in splits.items():
-    print(f"  {split}: {count}")
+for code, count in split_counts.items():
+    print(f"  {quality_splits[code]}: {count}")
 
 # Sample topic
-sample_topic_q = list(quality_topics.keys())[0]
-sample_q = [r for r in quality_data if r['topic'] == sample_topic_q][:3]
-print(f"\nSample from topic '{sample_topic_q}':")
-for i, row in enumerate(sample_q, 1):
-    print(f"\n  Example {i}:")
-    print(f"    Argument: {row['argument'][:80]}...")
-    print(f"    Topic: {row['topic']}")
-    stance_label = "PRO" if row['stance_WA'] == '1' else ("CON" if row['stance_WA'] == '-1' else "OTHER")
-    print(f"    Stance: {stance_label}")
-    print(f"    Quality (WA): {row['WA']}")
-    print(f"    Set: {row['set']}")
-
-# Check for overlap in topics
-common_topics = set(topics.keys()) & set(quality_topics.keys())
+if quality_topics:
+    sample_topic_q = quality_topics[0]
+    print(f"\nSample from topic '{sample_topic_q}':")
+    for i, (argument, stance, wa, split) in enumerate(sample_q, 1):
+        print(f"\n  Example {i}:")
+        print(f"    Argument: {argument[:80]}...")
+        print(f"    Topic: {sample_topic_q}")
+        stance_label = "PRO" if stance == 1 else ("CON" if stance == -1 else "OTHER")
+        print(f"    Stance: {stance_label}")
+        print(f"    Quality (WA): {wa}")
+        print(f"    Set: {split}")
+
+# Check for overlap in topics: join the quality topic vocabulary against ArgKP's
+common_topics = [t for t in quality_topics if t in topics]
 print(f"\n{'='*80}")
 print(f"TOPIC OVERLAP BETWEEN DATASETS:")
 print(f"{'='*80}")
 print(f"\nTopics in both ArgKP and Quality datasets: {len(common_topics)}")
-for topic in list(common_topics)[:10]:
+for topic in common_topics[:10]:
     print(f"  - {topic}")
 
 print(f"\n{'='*80}")
@@ -124,14 +157,14 @@ print("KEY FINDINGS:")
 print(f"{'='*80}")
 print(f"""
 1. ArgKP Dataset:
-   - {len(argkp_data)} argument-keypoint pairs
+   - {argkp_total} argument-keypoint pairs
    - {len(topics)} topics
    - Has PRO/CON stance labels
    - Task: Match arguments to key points (summarization/grouping)
    - NO argument structure annotations (no Claims/Premises/Relations)
 
 2. Quality Dataset:
-   - {len(quality_data)} arguments
+   - {quality_total} arguments
    - {len(quality_topics)} topics
    - Has PRO/CON stance labels
    - Has quality scores
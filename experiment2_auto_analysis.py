@@ -4,37 +4,42 @@ Experiment 2: Automated Structural Analysis (Without Manual Stance Annotation)
 Analyzes ALL essays and compares structural patterns
 """
 
-import os
-import re
-from collections import defaultdict
+import argparse
 import json
 
-BRAT_DIR = 'dataset/ArgumentAnnotatedEssays-2.0/brat-project-final'
-
-def parse_brat_annotation(ann_file):
-    """Parse BRAT annotation file"""
-    with open(ann_file, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
+from analysis.aaec.corpus import load_corpus
+from analysis.aaec.graph import ArgumentGraph
+from analysis.parallel import ordered_map
+from analysis.results import write_jsonl, write_results
+from analysis.stats import FeatureMatrix
 
+BRAT_DIR = 'dataset/ArgumentAnnotatedEssays-2.0/brat-project-final'
+RESULTS_JSON = 'structural_analysis_results.json'
+RESULTS_COL = 'structural_analysis_results.col'
+
+# compute_structural_features field -> column typecode in the results file
+FEATURE_FIELDS = {
+    'major_claims': 'i',
+    'claims': 'i',
+    'premises': 'i',
+    'supports': 'i',
+    'attacks': 'i',
+    'max_depth': 'i',
+    'avg_breadth': 'd',
+    'attack_ratio': 'd',
+    'evidence_density': 'd',
+}
+
+def essay_structure(corpus, idx):
+    """Components and relations of one essay from the shared corpus tables"""
     components = {}
-    for line in lines:
-        if line.startswith('T'):
-            parts = line.strip().split('\t')
-            comp_id = parts[0]
-            type_span = parts[1].split(' ', 1)
-            comp_type = type_span[0]
-            text = parts[2] if len(parts) > 2 else ""
-            components[comp_id] = {'id': comp_id, 'type': comp_type, 'text': text}
-
-    relations = []
-    for line in lines:
-        if line.startswith('R'):
-            parts = line.strip().split()
-            rel_type = parts[1]
-            arg1 = parts[2].split(':')[1]
-            arg2 = parts[3].split(':')[1]
-            relations.append({'type': rel_type, 'from': arg1, 'to': arg2})
-
+    # Spans only; text is sliced from the essay when a caller needs it
+    for tid, comp_type, start, end, _ in corpus.component_records(idx, with_text=False):
+        components[tid] = {'id': tid, 'type': comp_type, 'start': start, 'end': end}
+    relations = [
+        {'type': rel_type, 'from': arg1, 'to': arg2}
+        for _, rel_type, arg1, arg2 in corpus.relation_records(idx)
+    ]
     return components, relations
 
 
@@ -46,20 +51,16 @@ def compute_structural_features(components, relations):
     supports = sum(1 for r in relations if r['type'] == 'supports')
     attacks = sum(1 for r in relations if r['type'] == 'attacks')
 
-    children = defaultdict(list)
-    for rel in relations:
-        children[rel['to']].append(rel['from'])
+    graph, index = ArgumentGraph.from_relations(
+        components, ((r['type'], r['from'], r['to']) for r in relations)
+    )
 
-    def get_max_depth(start_id):
-        if not children[start_id]:
-            return 1
-        return 1 + max(get_max_depth(child) for child in children[start_id])
+    major_claim_ids = [index[c['id']] for c in components.values() if c['type'] == 'MajorClaim']
+    depth = graph.walk(major_claim_ids)['depth']
+    max_depth = max((depth[mc] for mc in major_claim_ids), default=0)
 
-    major_claim_ids = [c['id'] for c in components.values() if c['type'] == 'MajorClaim']
-    max_depth = max((get_max_depth(mc_id) for mc_id in major_claim_ids), default=0)
-
-    all_claims = [c['id'] for c in components.values() if c['type'] in ['Claim', 'MajorClaim']]
-    breadths = [len(children[claim_id]) for claim_id in all_claims]
+    all_claims = [index[c['id']] for c in components.values() if c['type'] in ['Claim', 'MajorClaim']]
+    breadths = [graph.breadth(claim) for claim in all_claims]
     avg_breadth = sum(breadths) / len(breadths) if breadths else 0
 
     attack_ratio = attacks / (supports + attacks) if (supports + attacks) > 0 else 0
@@ -79,22 +80,35 @@ def compute_structural_features(components, relations):
     }
 
 
-def main():
+_worker_corpus = None
+
+
+def _init_worker(brat_dir):
+    global _worker_corpus
+    _worker_corpus = load_corpus(brat_dir)
+
+
+def _essay_features(idx):
+    components, relations = essay_structure(_worker_corpus, idx)
+    features = compute_structural_features(components, relations)
+    features['essay_id'] = _worker_corpus.ann_name(idx)
+    return features
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=1, help='worker processes (0 = one per CPU)')
+    parser.add_argument('--jsonl', metavar='PATH', help='also write the features as JSON Lines')
+    args = parser.parse_args(argv)
+
     print("="*80)
     print("AUTOMATED STRUCTURAL ANALYSIS OF ALL ESSAYS")
     print("="*80)
 
-    all_features = []
-
-    # Analyze all essays
-    essay_files = sorted([f for f in os.listdir(BRAT_DIR) if f.endswith('.ann')])
-
-    for essay_file in essay_files:
-        ann_path = os.path.join(BRAT_DIR, essay_file)
-        components, relations = parse_brat_annotation(ann_path)
-        features = compute_structural_features(components, relations)
-        features['essay_id'] = essay_file
-        all_features.append(features)
+    # Analyze all essays (sharded across workers, merged back in essay order)
+    corpus = load_corpus(BRAT_DIR)
+    all_features = list(ordered_map(_essay_features, range(len(corpus)), args.workers,
+                                    initializer=_init_worker, initargs=(BRAT_DIR,)))
 
     print(f"\nAnalyzed {len(all_features)} essays")
 
@@ -108,21 +122,17 @@ def main():
     print(f"\n{'Feature':<25} {'Mean':>12} {'Min':>12} {'Max':>12} {'Std Dev':>12}")
     print("-" * 77)
 
-    for fname in feature_names:
-        vals = [f[fname] for f in all_features]
-        mean = sum(vals) / len(vals)
-        min_val = min(vals)
-        max_val = max(vals)
-
-        # Calculate std dev
-        variance = sum((x - mean) ** 2 for x in vals) / len(vals)
-        std_dev = variance ** 0.5
-
-        print(f"{fname:<25} {mean:>12.3f} {min_val:>12.3f} {max_val:>12.3f} {std_dev:>12.3f}")
+    # One essays x features matrix; every column summarized in one call
+    described = FeatureMatrix.from_records(all_features, feature_names).describe()
+    for fname, d in described.items():
+        print(f"{fname:<25} {d['mean']:>12.3f} {d['min']:>12.3f} {d['max']:>12.3f} {d['std']:>12.3f}")
 
-    # Save results
-    with open('structural_analysis_results.json', 'w') as f:
+    # Save results: indented JSON, typed columns for readers, JSON Lines on request
+    with open(RESULTS_JSON, 'w') as f:
         json.dump(all_features, f, indent=2)
+    write_results(RESULTS_COL, all_features, FEATURE_FIELDS)
+    if args.jsonl:
+        write_jsonl(args.jsonl, all_features)
 
     print("\n" + "="*80)
     print("KEY INSIGHTS:")
@@ -130,15 +140,15 @@ def main():
 
     print(f"""
 1. ARGUMENT STRUCTURE CHARACTERISTICS:
-   - Average depth of argument chains: {sum(f['max_depth'] for f in all_features)/len(all_features):.2f} levels
-   - Average breadth per claim: {sum(f['avg_breadth'] for f in all_features)/len(all_features):.2f} supporters
-   - Attack vs Support ratio: {sum(f['attack_ratio'] for f in all_features)/len(all_features):.4f}
-   - Evidence density: {sum(f['evidence_density'] for f in all_features)/len(all_features):.2f} premises per claim
+   - Average depth of argument chains: {described['max_depth']['mean']:.2f} levels
+   - Average breadth per claim: {described['avg_breadth']['mean']:.2f} supporters
+   - Attack vs Support ratio: {described['attack_ratio']['mean']:.4f}
+   - Evidence density: {described['evidence_density']['mean']:.2f} premises per claim
 
 2. COMPONENT DISTRIBUTION:
-   - Average major claims: {sum(f['major_claims'] for f in all_features)/len(all_features):.2f}
-   - Average claims: {sum(f['claims'] for f in all_features)/len(all_features):.2f}
-   - Average premises: {sum(f['premises'] for f in all_features)/len(all_features):.2f}
+   - Average major claims: {described['major_claims']['mean']:.2f}
+   - Average claims: {described['claims']['mean']:.2f}
+   - Average premises: {described['premises']['mean']:.2f}
 
 3. RELATION PATTERNS:
    - Support relations dominate over attack relations
@@ -151,7 +161,7 @@ def main():
    - Run statistical significance tests
    - Create visualizations
 
-Results saved to: structural_analysis_results.json
+Results saved to: {RESULTS_JSON} (columns: {RESULTS_COL})
     """)
 
 
@@ -4,49 +4,37 @@ Experiment 2: Pro vs Con Structural Analysis
 Compares argument structures between pro and con essays on same topics
 """
 
+import argparse
+import csv
+import hashlib
 import os
-import re
-from collections import defaultdict
 import json
+from collections import defaultdict
+
+from analysis.aaec.corpus import load_corpus
+from analysis.aaec.graph import ArgumentGraph
 
 # Configuration
 BRAT_DIR = 'dataset/ArgumentAnnotatedEssays-2.0/brat-project-final'
+PROMPTS_CSV = 'dataset/ArgumentAnnotatedEssays-2.0/prompts.csv'
+STANCE_CSV = 'analysis/aaec/stance_labels.csv'
+# A source header line, then one JSON object per annotated essay, appended as soon as it is decided
+JOURNAL_PATH = 'stance_annotations.journal.jsonl'
 
-def parse_brat_annotation(ann_file):
-    """Parse BRAT annotation file and extract argument structure"""
-    with open(ann_file, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-
-    # Parse components
+def essay_structure(corpus, idx):
+    """Components and relations of one essay from the shared corpus tables"""
     components = {}
-    for line in lines:
-        if line.startswith('T'):
-            parts = line.strip().split('\t')
-            comp_id = parts[0]
-            type_span = parts[1].split(' ', 1)
-            comp_type = type_span[0]
-            text = parts[2] if len(parts) > 2 else ""
-            components[comp_id] = {
-                'id': comp_id,
-                'type': comp_type,
-                'text': text
-            }
-
-    # Parse relations
-    relations = []
-    for line in lines:
-        if line.startswith('R'):
-            # Format: R1	supports Arg1:T4 Arg2:T3
-            parts = line.strip().split()
-            rel_type = parts[1]
-            arg1 = parts[2].split(':')[1]
-            arg2 = parts[3].split(':')[1]
-            relations.append({
-                'type': rel_type,
-                'from': arg1,
-                'to': arg2
-            })
-
+    # Spans only; text is sliced from the essay when a caller needs it
+    records = corpus.component_records(idx, with_text=False)
+    for row, (tid, comp_type, start, end, _) in zip(corpus.component_rows(idx), records):
+        components[tid] = {
+            'id': tid, 'type': comp_type, 'start': start, 'end': end,
+            'stance': corpus.component_stance(row),
+        }
+    relations = [
+        {'type': rel_type, 'from': arg1, 'to': arg2}
+        for _, rel_type, arg1, arg2 in corpus.relation_records(idx)
+    ]
     return components, relations
 
 
@@ -62,24 +50,18 @@ def compute_structural_features(components, relations):
     supports = sum(1 for r in relations if r['type'] == 'supports')
     attacks = sum(1 for r in relations if r['type'] == 'attacks')
 
-    # Build adjacency for depth calculation
-    children = defaultdict(list)
-    for rel in relations:
-        children[rel['to']].append(rel['from'])
+    # Build CSR adjacency once; depth is a memoized, cycle-safe DFS from major claims
+    graph, index = ArgumentGraph.from_relations(
+        components, ((r['type'], r['from'], r['to']) for r in relations)
+    )
 
-    # Calculate maximum depth (BFS from major claims)
-    def get_max_depth(start_id):
-        if not children[start_id]:
-            return 1
-        max_child_depth = max(get_max_depth(child) for child in children[start_id])
-        return 1 + max_child_depth
-
-    major_claim_ids = [c['id'] for c in components.values() if c['type'] == 'MajorClaim']
-    max_depth = max((get_max_depth(mc_id) for mc_id in major_claim_ids), default=0)
+    major_claim_ids = [index[c['id']] for c in components.values() if c['type'] == 'MajorClaim']
+    depth = graph.walk(major_claim_ids)['depth']
+    max_depth = max((depth[mc] for mc in major_claim_ids), default=0)
 
     # Calculate breadth (average supporters per claim)
-    all_claims = [c['id'] for c in components.values() if c['type'] in ['Claim', 'MajorClaim']]
-    breadths = [len(children[claim_id]) for claim_id in all_claims]
+    all_claims = [index[c['id']] for c in components.values() if c['type'] in ['Claim', 'MajorClaim']]
+    breadths = [graph.breadth(claim) for claim in all_claims]
     avg_breadth = sum(breadths) / len(breadths) if breadths else 0
 
     # Calculate ratios
@@ -104,22 +86,18 @@ def compute_structural_features(components, relations):
     }
 
 
-def determine_essay_stance(essay_id, components):
-    """
-    Determine essay stance by reading first paragraph and major claim
-    This is a MANUAL verification step - needs human judgment
-    Returns: 'PRO', 'CON', or 'UNKNOWN'
-    """
-    txt_file = os.path.join(BRAT_DIR, essay_id.replace('.ann', '.txt'))
-
+def show_essay(essay_id, components, essay_text):
+    """Print what a human needs to judge the stance of one essay"""
     # Get major claim text
-    major_claims = [c['text'] for c in components.values() if c['type'] == 'MajorClaim']
+    major_claims = [essay_text[c['start']:c['end']] for c in components.values() if c['type'] == 'MajorClaim']
+    # Annotated claim stances (toward the major claim, not the prompt)
+    n_for = sum(1 for c in components.values() if c['stance'] == 'For')
+    n_against = sum(1 for c in components.values() if c['stance'] == 'Against')
 
     # Read first paragraph
-    with open(txt_file, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-        topic = lines[0].strip() if lines else ""
-        first_para = lines[2].strip() if len(lines) > 2 else ""
+    lines = essay_text.splitlines()
+    topic = lines[0].strip() if lines else ""
+    first_para = lines[2].strip() if len(lines) > 2 else ""
 
     print(f"\n{'='*80}")
     print(f"Essay: {essay_id}")
@@ -128,53 +106,182 @@ def determine_essay_stance(essay_id, components):
     for mc in major_claims:
         print(f"  - {mc}")
     print(f"\nFirst sentence: {first_para[:150]}...")
+    print(f"Claims for / against the major claim: {n_for} / {n_against}")
     print(f"{'='*80}")
 
+
+def determine_essay_stance(essay_id, components, essay_text):
+    """
+    Determine essay stance by reading first paragraph and major claim
+    This is a MANUAL verification step - needs human judgment
+    Returns: 'PRO', 'CON', or 'UNKNOWN'
+    """
+    show_essay(essay_id, components, essay_text)
+
     # Manual annotation
     stance = input("Enter stance (PRO/CON/SKIP): ").strip().upper()
     return stance if stance in ['PRO', 'CON'] else 'UNKNOWN'
 
 
-def main():
+def load_stance_labels(path=STANCE_CSV):
+    """Stance provider for batch mode: essay stem -> 'PRO' / 'CON' from a labels CSV"""
+    stances = {}
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            stem = os.path.splitext((row.get('essay_id') or '').strip())[0]
+            stance = (row.get('stance') or '').strip().upper()
+            if stem and stance in ['PRO', 'CON']:
+                stances[stem] = stance
+    return stances
+
+
+def load_topic_pairs(path=PROMPTS_CSV):
+    """Every prompt with exactly two essays, as [{'essays', 'topic'}] in file order"""
+    prompt_to_essays = defaultdict(list)
+    with open(path, 'r', encoding='latin-1') as f:
+        for row in csv.DictReader(f, delimiter=';'):
+            prompt_to_essays[row['PROMPT']].append(row['ESSAY'])
+    return [{'essays': ids, 'topic': prompt} for prompt, ids in prompt_to_essays.items() if len(ids) == 2]
+
+
+def journal_source(args):
+    """Where the stances come from: the mode, plus the stances file (path and content hash) for --batch"""
+    if not args.batch:
+        return {'mode': 'interactive'}
+    with open(args.stances, 'rb') as f:
+        digest = hashlib.sha1(f.read()).hexdigest()
+    return {'mode': 'batch', 'stances': os.path.abspath(args.stances), 'sha1': digest}
+
+
+def read_journal(path):
+    """``(source, entries)`` of an append-only journal; entries are keyed by essay id.
+
+    The first line records the ``journal_source`` the decisions were made
+    from (``None`` if there is none). A run killed mid-write can leave a torn
+    last line; it is dropped and cut off so the next append starts on a clean
+    line.
+    """
+    source = None
+    entries = {}
+    if not os.path.exists(path):
+        return source, entries
+    good = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                break
+            if 'source' in entry:
+                source = entry['source']
+            else:
+                entries[entry['essay_id']] = entry
+            good += len(line)
+    if good < os.path.getsize(path):
+        with open(path, 'r+b') as f:
+            f.truncate(good)
+    return source, entries
+
+
+def append_journal(f, entry):
+    f.write(json.dumps(entry) + '\n')
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--batch', action='store_true',
+                        help='take stances from --stances instead of asking, for every same-topic pair')
+    parser.add_argument('--stances', default=STANCE_CSV, help='stance labels CSV used by --batch')
+    parser.add_argument('--journal', default=JOURNAL_PATH, help='append-only progress journal')
+    parser.add_argument('--restart', action='store_true', help='discard the journal and start over')
+    args = parser.parse_args(argv)
+
     print("="*80)
     print("EXPERIMENT 2: PRO VS CON STRUCTURAL ANALYSIS")
     print("="*80)
 
-    # Load previously identified pairs
-    with open('essay_analysis_results.json', 'r') as f:
-        analysis = json.load(f)
+    if args.batch:
+        # All prompts with exactly two essays, labelled from the stance provider
+        pairs = load_topic_pairs()
+        stance_labels = load_stance_labels(args.stances)
+    else:
+        # Load previously identified pairs
+        with open('essay_analysis_results.json', 'r') as f:
+            analysis = json.load(f)
 
-    pairs = analysis['pair_examples'][:15]  # Top 15 pairs
+        pairs = analysis['pair_examples'][:15]  # Top 15 pairs
 
     print(f"\nFound {len(pairs)} potential pro/con pairs")
-    print("\nSTEP 1: Manual Stance Annotation")
-    print("For each essay pair, we'll determine the stance...\n")
+    if args.batch:
+        print(f"\nSTEP 1: Stance labels from {args.stances}")
+        pairs_to_annotate = pairs
+    else:
+        print("\nSTEP 1: Manual Stance Annotation")
+        print("For each essay pair, we'll determine the stance...\n")
+        pairs_to_annotate = pairs[:10]  # Annotate first 10 pairs
+
+    corpus = load_corpus(BRAT_DIR)
+
+    # Resume from the journal: essays already decided (including skips) are not redone
+    if args.restart and os.path.exists(args.journal):
+        os.remove(args.journal)
+    source = journal_source(args)
+    journal_header, journal = read_journal(args.journal)
+    if journal_header is None and journal:
+        raise SystemExit(f"{args.journal} does not record where its stances came from; "
+                         f"use --restart or another --journal")
+    if journal_header is not None and journal_header != source:
+        raise SystemExit(f"{args.journal} was written from {journal_header}, not {source}; "
+                         f"use --restart or another --journal")
+    if journal:
+        print(f"Resuming: {len(journal)} essays already in {args.journal}")
+    journal_file = open(args.journal, 'a', encoding='utf-8')
+    if journal_header is None:
+        append_journal(journal_file, {'source': source})
 
     # Annotate stances
     stance_annotations = {}
 
-    for i, pair_info in enumerate(pairs[:10], 1):  # Annotate first 10 pairs
+    for i, pair_info in enumerate(pairs_to_annotate, 1):
         print(f"\n{'*'*80}")
-        print(f"PAIR {i}/10: {pair_info['topic'][:70]}")
+        print(f"PAIR {i}/{len(pairs_to_annotate)}: {pair_info['topic'][:70]}")
         print(f"{'*'*80}")
 
         essays = pair_info['essays']
 
         for essay_id in essays:
-            ann_file = os.path.join(BRAT_DIR, essay_id.replace('.txt', '.ann'))
-            if not os.path.exists(ann_file):
-                continue
-
-            components, relations = parse_brat_annotation(ann_file)
-            stance = determine_essay_stance(essay_id, components)
+            entry = journal.get(essay_id)
+            if entry is None:
+                try:
+                    idx = corpus.index_of(essay_id)
+                except KeyError:
+                    continue
+
+                components, relations = essay_structure(corpus, idx)
+                if args.batch:
+                    stance = stance_labels.get(os.path.splitext(essay_id)[0], 'UNKNOWN')
+                    print(f"{essay_id}: {stance}")
+                else:
+                    stance = determine_essay_stance(essay_id, components, corpus.texts[idx])
+
+                entry = {'essay_id': essay_id, 'stance': stance}
+                if stance != 'UNKNOWN':
+                    entry.update({
+                        'claim_stance': corpus.essay_stance(idx),
+                        'features': compute_structural_features(components, relations),
+                        'topic': pair_info['topic']
+                    })
+                append_journal(journal_file, entry)
+                journal[essay_id] = entry
+            else:
+                print(f"{essay_id}: {entry['stance']} (from journal)")
 
-            if stance != 'UNKNOWN':
-                features = compute_structural_features(components, relations)
-                stance_annotations[essay_id] = {
-                    'stance': stance,
-                    'features': features,
-                    'topic': pair_info['topic']
-                }
+            if entry['stance'] != 'UNKNOWN':
+                stance_annotations[essay_id] = {k: v for k, v in entry.items() if k != 'essay_id'}
 
         # Check if we have a valid pro/con pair
         if len(stance_annotations) >= 2:
@@ -184,6 +291,8 @@ def main():
             else:
                 print(f"\n✗ Both essays have same stance - not a valid pair")
 
+    journal_file.close()
+
     # Save annotations
     with open('stance_annotations.json', 'w') as f:
         json.dump(stance_annotations, f, indent=2)